@@ -2,6 +2,7 @@
 import click
 from .commands.download import download_cmd
 from .commands.filter import filter_cmd
+from .commands.summarize import summarize_cmd
 
 @click.group()
 @click.version_option()
@@ -11,6 +12,7 @@ def main():
 
 main.add_command(download_cmd)
 main.add_command(filter_cmd)
+main.add_command(summarize_cmd)
 
 if __name__ == "__main__":
     main()
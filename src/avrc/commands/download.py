@@ -2,11 +2,30 @@
 import click
 from ..utils.zenodo import get_file_info, download_subset, ZENODO_SUBSETS
 
+RATE_UNITS = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3}
+
+def parse_rate(ctx, param, value):
+    """Parse a transfer rate such as 500K or 10M into bytes per second."""
+    if value is None:
+        return None
+    number, unit = value[:-1], value[-1:].upper()
+    if unit not in RATE_UNITS:
+        number, unit = value, ''
+    try:
+        rate = int(float(number) * RATE_UNITS[unit])
+    except ValueError:
+        raise click.BadParameter(f"invalid rate '{value}', use e.g. 500K, 10M or 1G")
+    if rate <= 0:
+        raise click.BadParameter("rate must be positive")
+    return rate
+
 @click.command(name="download")
 @click.argument("subset", type=click.Choice(["all", "hq", "phage"]), required=False)
 @click.option("-o", "--output", default=".", help="Output directory")
 @click.option("--list", is_flag=True, help="List available subsets")
-def download_cmd(subset, output, list):
+@click.option("--limit-rate", callback=parse_rate,
+              help="Maximum download rate in bytes per second (suffixes K, M, G)")
+def download_cmd(subset, output, list, limit_rate):
     """Download AVrC data subsets."""
     if list:
         file_info = get_file_info()
@@ -27,7 +46,7 @@ def download_cmd(subset, output, list):
         )
 
     try:
-        if download_subset(subset, output):
+        if download_subset(subset, output, limit_rate=limit_rate):
             click.echo("\nDownload completed successfully!")
     except Exception as e:
         raise click.ClickException(str(e))
\ No newline at end of file
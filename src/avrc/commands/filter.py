@@ -1,8 +1,180 @@
 # src/avrc/commands/filter.py
 import click
+import secrets
 from pathlib import Path
-from ..utils.metadata import load_sequence_mapping, load_metadata, apply_filters
-from ..utils.seqkit import verify_seqkit, filter_sequences, count_sequences
+from ..utils.metadata import (load_sequence_mapping, load_metadata, apply_filters_mask,
+                              select_rows, restrict_mask, sample_mask,
+                              criterion_masks)
+from ..utils.seqkit import (verify_seqkit, filter_sequences, count_sequences,
+                            find_sequence_shards, filter_sequence_shards)
+from ..utils.columnar import columnar_available, write_joined_metadata
+from ..utils.content import make_content_filter, filter_sequences_by_content
+from ..utils.iddict import read_id_list
+from ..utils.plan import (criterion_selectivity, extraction_model, calibrate_throughput,
+                          estimate_output)
+from ..utils.manifest import (file_digest, input_fingerprint, temp_output_path, commit_output,
+                              remove_manifest, write_manifest)
+
+INPUT_FILES = [
+    'AvRCv1.SequenceTable.csv',
+    'AvRCv1.Merged_Quality.csv',
+    'AvRCv1.Merged_ViralDesc.csv',
+    'AvRCv1.Merged_PredictedHosts.csv',
+    'AVrC_allrepresentatives.fasta.gz'
+]
+
+def _commit(temp_file, output_file, records, outputs):
+    """Move an output into place and record it in the manifest outputs."""
+    digest, rewritten = commit_output(temp_file, output_file)
+    outputs[output_file.name] = {
+        'sha256': digest,
+        'size': output_file.stat().st_size,
+        'records': records
+    }
+    if rewritten:
+        click.echo(f"Wrote {records} records to {output_file}")
+    else:
+        click.echo(f"{output_file} is unchanged ({records} records), keeping existing file")
+
+def _write_metadata(metadata, filtered_mask, output_dir, outputs, metadata_format, per_table_csv):
+    """Write the filtered metadata as per-table CSV files and/or one joined table."""
+    click.echo("Writing filtered metadata...")
+    selected = {name: select_rows(df, filtered_mask) for name, df in metadata.items()}
+
+    if metadata_format != 'csv':
+        output_file = output_dir / f'filtered_metadata.{metadata_format}'
+        temp_file = temp_output_path(output_file)
+        try:
+            rows = write_joined_metadata(metadata, selected, temp_file, metadata_format)
+        except Exception:
+            if temp_file.exists():
+                temp_file.unlink()
+            raise
+        _commit(temp_file, output_file, rows, outputs)
+
+    if metadata_format == 'csv' or per_table_csv:
+        for name, filtered_df in selected.items():
+            output_file = output_dir / f'filtered_{name}.csv'
+            temp_file = temp_output_path(output_file)
+            try:
+                filtered_df.to_csv(temp_file, index=False)
+            except Exception:
+                if temp_file.exists():
+                    temp_file.unlink()
+                raise
+            _commit(temp_file, output_file, len(filtered_df), outputs)
+
+def _write_sequences(input_dir, output_dir, filtered_ids, content_filter, dedup, shards, threads,
+                     outputs):
+    """
+    Extract the filtered sequences from the catalogue.
+    
+    Returns:
+        list: IDs of the sequences written if content filters were applied, else None
+    """
+    click.echo("Writing filtered sequences...")
+    sequence_file = Path(input_dir) / 'AVrC_allrepresentatives.fasta.gz'
+    output_file = output_dir / 'filtered_sequences.fasta.gz'
+    temp_file = temp_output_path(output_file)
+    id_list_file = output_dir / 'filtered_ids.txt'
+    kept_ids = None
+
+    # Write filtered IDs to a text file
+    with open(id_list_file, 'w') as f:
+        for seq_id in filtered_ids:
+            f.write(f"{seq_id}\n")
+
+    try:
+        # Filter sequences, one worker per shard if shards were given
+        if content_filter or dedup:
+            click.echo("Applying sequence content filters...")
+            if shards:
+                click.echo(f"Filtering {len(shards)} shards with {threads} workers...")
+                kept_ids = filter_sequences_by_content(shards, temp_file, id_list_file,
+                                                       content_filter, dedup, processes=threads)
+            else:
+                kept_ids = filter_sequences_by_content([sequence_file], temp_file, id_list_file,
+                                                       content_filter, dedup,
+                                                       threads=threads if threads > 1 else None)
+        elif shards:
+            click.echo(f"Filtering {len(shards)} shards with {threads} workers...")
+            filter_sequence_shards(shards, temp_file, id_list_file, threads)
+        else:
+            filter_sequences(sequence_file, temp_file, id_list_file,
+                             threads if threads > 1 else None)
+        
+        # Clean up ID list file
+        id_list_file.unlink()
+        
+        # Count and report filtered sequences
+        count = len(kept_ids) if kept_ids is not None else count_sequences(temp_file)
+        _commit(temp_file, output_file, count, outputs)
+        return kept_ids
+
+    except Exception:
+        if id_list_file.exists():
+            id_list_file.unlink()
+        if temp_file.exists():
+            temp_file.unlink()
+        raise
+
+def _load_id_list(path, representative_ids, votu_map, required):
+    """Read an ID list file into a contig code bitmap and report matches."""
+    bitmap, total, matched = read_id_list(path, representative_ids, votu_map)
+    click.echo(f"Read {total} IDs from {path}, {matched} match representative sequences")
+    if total and not matched:
+        msg = (f"None of the {total} IDs in {path} match representative sequences, "
+               "expected representative contig IDs (or vOTU IDs with --map-votu) "
+               "in the first column")
+        if required:
+            raise click.ClickException(msg)
+        click.echo(f"Warning: {msg}", err=True)
+    return bitmap
+
+def _format_bytes(size):
+    """Format a byte count for display."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1000:
+            return f"{size:.1f}{unit}"
+        size /= 1000
+    return f"{size:.1f}TB"
+
+def _echo_plan(metadata, masks, filtered_mask, sampling, content_filtering, sequence_files,
+               output, model):
+    """Print per-criterion selectivity and output estimates."""
+    total, rows = criterion_selectivity(metadata, masks)
+    click.echo("\nQuery plan:")
+    click.echo(f"  {'criterion':<16}{'matches':>12}{'selectivity':>13}{'remaining':>12}")
+    click.echo(f"  {'representatives':<16}{total:>12}{'':>13}{total:>12}")
+    for row in rows:
+        click.echo(f"  {row['criterion']:<16}{row['matches']:>12}"
+                   f"{row['selectivity']:>12.1%} {row['remaining']:>12}")
+    if sampling:
+        click.echo(f"  {'sample':<16}{'':>12}{'':>13}{int(filtered_mask.sum()):>12}")
+
+    throughput = None
+    if output in ['fasta', 'both']:
+        throughput = calibrate_throughput(sequence_files[0], seqkit_threads=model['seqkit_threads'])
+    estimate = estimate_output(metadata, filtered_mask, sequence_files, throughput,
+                               model['workers'], model['serial_deflate'])
+    click.echo(f"\nEstimated output: {estimate['sequences']} sequences, "
+               f"{estimate['bases'] / 1e6:.1f} Mbp")
+    if output in ['fasta', 'both']:
+        if estimate['compressed_bytes'] is not None:
+            click.echo(f"Estimated compressed FASTA size: {_format_bytes(estimate['compressed_bytes'])}")
+        if estimate['seconds'] is not None:
+            click.echo(f"Estimated extraction time: {estimate['seconds']:.0f}s "
+                       f"(reading {_format_bytes(estimate['catalogue_bytes'])} with "
+                       f"{model['workers']} seqkit worker(s) at "
+                       f"{_format_bytes(throughput['inflate'])}/s each"
+                       f"{', compressing in one Python process' if model['serial_deflate'] else ''})")
+            if throughput['reader'] != 'seqkit':
+                click.echo("seqkit not available, read rate measured with zlib instead")
+        else:
+            click.echo("Extraction time not estimated, sequence file not found or unreadable")
+    if content_filtering:
+        click.echo("Sequence content filters are applied during extraction, "
+                   "estimates are upper bounds")
 
 @click.command(name="filter")
 @click.argument('input_dir', type=click.Path(exists=True))
@@ -20,28 +192,98 @@ from ..utils.seqkit import verify_seqkit, filter_sequences, count_sequences
 @click.option('--host-domain', help='Filter by host domain (case-insensitive)')
 @click.option('--host-phylum', help='Filter by host phylum (case-insensitive)')
 @click.option('--host-genus', help='Filter by host genus (case-insensitive)')
+@click.option('--ids-file', type=click.Path(exists=True, dir_okay=False),
+              help='Keep only contig IDs listed in this file (first field of each line, may be gzipped)')
+@click.option('--exclude-ids-file', type=click.Path(exists=True, dir_okay=False),
+              help='Exclude contig IDs listed in this file (first field of each line, may be gzipped)')
+@click.option('--map-votu', is_flag=True,
+              help='Map vOTU IDs in the ID files to their representative contig')
+@click.option('--min-gc', type=click.FloatRange(0, 1),
+              help='Minimum GC fraction of the sequence (0-1)')
+@click.option('--max-gc', type=click.FloatRange(0, 1),
+              help='Maximum GC fraction of the sequence (0-1)')
+@click.option('--max-n-fraction', type=click.FloatRange(0, 1),
+              help='Maximum fraction of N bases in the sequence (0-1)')
+@click.option('--motif', help='Keep sequences containing this motif on either strand')
+@click.option('--dedup', is_flag=True, help='Remove sequences identical to an earlier one')
+@click.option('--sample', 'sample_size', type=click.IntRange(min=1),
+              help='Randomly keep this many matching sequences (per stratum with --stratify-by)')
+@click.option('--sample-fraction', type=click.FloatRange(0, 1, min_open=True),
+              help='Randomly keep this fraction of matching sequences, rounded half up '
+                   '(per stratum with --stratify-by)')
+@click.option('--stratify-by', help='Metadata column defining the sampling strata (e.g. Host_Phylum)')
+@click.option('--seed', type=int, help='Random seed for sampling, recorded in the manifest')
 @click.option('--output', 
               type=click.Choice(['fasta', 'metadata', 'both']),
               required=True,
               help='Output format')
+@click.option('--metadata-format',
+              type=click.Choice(['csv', 'parquet', 'arrow']),
+              default='csv',
+              help='Metadata output format: per-table CSV files, or one joined Parquet or Arrow IPC table')
+@click.option('--per-table-csv', is_flag=True,
+              help='Also write the per-table CSV files with --metadata-format parquet or arrow')
+@click.option('--explain', is_flag=True,
+              help='Print per-criterion selectivity and output size/time estimates before writing')
+@click.option('--dry-run', is_flag=True,
+              help='Print the --explain report and exit without writing outputs')
 @click.option('--output-dir', 
               default='.',
               help='Output directory',
               type=click.Path())
+@click.option('--shards', 'shard_dir',
+              type=click.Path(exists=True, file_okay=False),
+              help='Directory of contiguous catalogue shards (seqkit split2 -s or -l) '
+                   'to filter one per worker')
+@click.option('--threads', 
+              default=1,
+              type=click.IntRange(min=1),
+              help='Number of parallel workers for sequence extraction')
 def filter_cmd(input_dir, quality, min_length, no_plasmids, realm, phylum,
                viral_class, lifestyle, host_domain, host_phylum, host_genus,
-               output, output_dir):
-    """Filter AVrC sequences based on metadata criteria."""
+               ids_file, exclude_ids_file, map_votu,
+               min_gc, max_gc, max_n_fraction, motif, dedup,
+               sample_size, sample_fraction, stratify_by, seed,
+               output, metadata_format, per_table_csv, explain, dry_run, output_dir,
+               shard_dir, threads):
+    """Filter AVrC sequences based on metadata and sequence content criteria."""
+    content_filter = make_content_filter(min_gc, max_gc, max_n_fraction, motif)
+    content_filtering = content_filter is not None or dedup
+    if content_filtering and output == 'metadata':
+        raise click.UsageError("Sequence content filters require --output fasta or both")
+
+    sampling = sample_size is not None or sample_fraction is not None
+    if sample_size is not None and sample_fraction is not None:
+        raise click.UsageError("--sample and --sample-fraction are mutually exclusive")
+    if not sampling and (stratify_by or seed is not None):
+        raise click.UsageError("--stratify-by and --seed require --sample or --sample-fraction")
+    if sampling and seed is None:
+        seed = secrets.randbelow(2**32)
+
+    # Check pyarrow if needed
+    if output in ['metadata', 'both'] and metadata_format != 'csv' and not dry_run:
+        columnar_ok, msg = columnar_available()
+        if not columnar_ok:
+            raise click.UsageError(msg)
+
     # Check seqkit if needed
-    if output in ['fasta', 'both']:
+    if output in ['fasta', 'both'] and not dry_run:
         seqkit_ok, msg = verify_seqkit()
         if not seqkit_ok:
             raise click.UsageError(msg)
 
+    # Find catalogue shards if requested
+    sequence_file = Path(input_dir) / 'AVrC_allrepresentatives.fasta.gz'
+    shards = []
+    if shard_dir:
+        shards = find_sequence_shards(shard_dir, sequence_file)
+        if not shards:
+            raise click.UsageError(f"No {sequence_file.name} shards found in {shard_dir}")
+
     try:
         # Load sequence mapping
         click.echo("Loading sequence mapping...")
-        representative_ids, votu_to_rep = load_sequence_mapping(input_dir)
+        representative_ids, votu_map = load_sequence_mapping(input_dir)
 
         # Load metadata
         click.echo("Loading metadata...")
@@ -61,48 +303,78 @@ def filter_cmd(input_dir, quality, min_length, no_plasmids, realm, phylum,
             'host_phylum': host_phylum,
             'host_genus': host_genus
         }
-        filtered_ids = apply_filters(metadata, **filter_params)
-        click.echo(f"Found {len(filtered_ids)} sequences matching criteria")
+        content_params = {
+            'min_gc': min_gc,
+            'max_gc': max_gc,
+            'max_n_fraction': max_n_fraction,
+            'motif': motif,
+            'dedup': dedup
+        }
+        sample_params = {
+            'sample_size': sample_size,
+            'sample_fraction': sample_fraction,
+            'stratify_by': stratify_by,
+            'seed': seed
+        }
+        id_params = {'map_votu': map_votu}
+        id_masks = {}
+        for key, path in [('include_ids', ids_file), ('exclude_ids', exclude_ids_file)]:
+            if path:
+                id_masks[key] = _load_id_list(path, representative_ids,
+                                              votu_map if map_votu else None,
+                                              required=key == 'include_ids')
+                id_params[f'{key}_file'] = str(path)
+                id_params[f'{key}_sha256'] = file_digest(path)
+
+        filtered_mask = apply_filters_mask(metadata, **filter_params, **id_masks)
+        click.echo(f"Found {int(filtered_mask.sum())} sequences matching criteria")
+
+        # Subsample the matching sequences
+        if sampling:
+            filtered_mask = sample_mask(metadata, filtered_mask, sample_size, sample_fraction,
+                                        stratify_by, seed)
+            click.echo(f"Sampled {int(filtered_mask.sum())} sequences (seed {seed})")
+
+        # Report the query plan and estimates
+        if explain or dry_run:
+            _echo_plan(
+                metadata,
+                criterion_masks(metadata, **filter_params, **id_masks),
+                filtered_mask, sampling, content_filtering, shards or [sequence_file], output,
+                extraction_model(threads, len(shards), content_filtering)
+            )
+            if dry_run:
+                return
+
+        filtered_ids = select_rows(metadata['quality'], filtered_mask)['contig_id'].drop_duplicates()
 
         # Create output directory
         output_dir = Path(output_dir)
         output_dir.mkdir(exist_ok=True)
+        remove_manifest(output_dir)
+        outputs = {}
 
-        # Write outputs
-        if output in ['metadata', 'both']:
-            click.echo("Writing filtered metadata...")
-            for name, df in metadata.items():
-                filtered_df = df[df['contig_id'].isin(filtered_ids)]
-                output_file = output_dir / f'filtered_{name}.csv'
-                filtered_df.to_csv(output_file, index=False)
-                click.echo(f"Wrote {len(filtered_df)} records to {output_file}")
-
+        # Write outputs to temporary files, then move them into place
         if output in ['fasta', 'both']:
-            click.echo("Writing filtered sequences...")
-            sequence_file = Path(input_dir) / 'AVrC_allrepresentatives.fasta.gz'
-            output_file = output_dir / 'filtered_sequences.fasta.gz'
-            id_list_file = output_dir / 'filtered_ids.txt'
+            kept_ids = _write_sequences(input_dir, output_dir, filtered_ids,
+                                        content_filter, dedup, shards, threads, outputs)
+            if kept_ids is not None:
+                # Keep metadata in line with the sequences passing content filters
+                filtered_mask = restrict_mask(filtered_mask, representative_ids.encode(kept_ids))
 
-            # Write filtered IDs to a text file
-            with open(id_list_file, 'w') as f:
-                for seq_id in filtered_ids:
-                    f.write(f"{seq_id}\n")
+        if output in ['metadata', 'both']:
+            _write_metadata(metadata, filtered_mask, output_dir, outputs,
+                            metadata_format, per_table_csv)
 
-            try:
-                # Filter sequences
-                filter_sequences(sequence_file, output_file, id_list_file)
-                
-                # Clean up ID list file
-                id_list_file.unlink()
-                
-                # Count and report filtered sequences
-                count = count_sequences(output_file)
-                click.echo(f"Wrote {count} sequences to {output_file}")
-
-            except Exception as e:
-                if id_list_file.exists():
-                    id_list_file.unlink()
-                raise
+        # Record parameters, input fingerprint and output hashes
+        manifest_path = write_manifest(
+            output_dir,
+            dict(filter_params, **id_params, **content_params, **sample_params,
+                 output=output, metadata_format=metadata_format),
+            input_fingerprint(input_dir, INPUT_FILES + [str(s.resolve()) for s in shards]),
+            outputs
+        )
+        click.echo(f"Wrote manifest to {manifest_path}")
 
     except Exception as e:
         raise click.ClickException(str(e))
\ No newline at end of file
@@ -0,0 +1,33 @@
+# src/avrc/commands/summarize.py
+import click
+from pathlib import Path
+from ..utils.summary import summarize, DIMENSIONS
+
+@click.command(name="summarize")
+@click.argument('input_dir', type=click.Path(exists=True))
+@click.option('--by', 'dimensions',
+              multiple=True,
+              type=click.Choice([d.replace('_', '-') for d in DIMENSIONS]),
+              help='Dimension to group by (repeat for several)')
+@click.option('--rebuild', is_flag=True, help='Rebuild the pre-aggregated summary tables')
+@click.option('--output-file',
+              type=click.Path(),
+              help='Write the summary to a CSV file instead of the terminal')
+def summarize_cmd(input_dir, dimensions, rebuild, output_file):
+    """Summarize AVrC sequence counts and lengths by metadata dimensions."""
+    try:
+        dimensions = [d.replace('-', '_') for d in dimensions]
+        summary, from_cube = summarize(input_dir, dimensions, rebuild)
+        if not from_cube:
+            click.echo("Grouping not pre-aggregated, computed from metadata", err=True)
+
+        if output_file:
+            summary.to_csv(Path(output_file), index=False)
+            click.echo(f"Wrote {len(summary)} groups to {output_file}")
+        elif summary.empty:
+            click.echo("No sequences to summarize")
+        else:
+            click.echo(summary.to_string(index=False))
+
+    except Exception as e:
+        raise click.ClickException(str(e))
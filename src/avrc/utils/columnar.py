@@ -0,0 +1,135 @@
+# src/avrc/utils/columnar.py
+"""Joined columnar (Parquet / Arrow IPC) metadata output."""
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency, see the 'columnar' extra
+    pa = None
+    pq = None
+
+# Rows converted and written at a time, one Parquet row group each
+BATCH_ROWS = 100_000
+
+def columnar_available():
+    """
+    Check whether pyarrow is installed.
+
+    Returns:
+        tuple: (bool, str) - (True if columnar output is available, status message)
+    """
+    if pa is None:
+        return False, ("Parquet and Arrow output require pyarrow. Install it with:\n"
+                       "   pip install 'avrc[columnar]'")
+    return True, f"pyarrow {pa.__version__} found"
+
+def _joined_columns(metadata):
+    """List output columns: quality columns, then new columns of the other tables."""
+    columns = list(metadata['quality'].columns)
+    for name in ['viral_desc', 'hosts']:
+        columns += [c for c in metadata[name].columns if c not in columns]
+    return columns
+
+def _arrow_type(dtype):
+    """Map a pandas dtype to the Arrow type used in the output schema."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return pa.bool_()
+    if pd.api.types.is_integer_dtype(dtype):
+        return pa.int64()
+    if pd.api.types.is_float_dtype(dtype):
+        return pa.float64()
+    return pa.string()
+
+def joined_schema(metadata):
+    """
+    Build the Arrow schema of the joined metadata table.
+
+    The schema is fixed up front so that batches where a column is entirely
+    missing still get the same types.
+
+    Args:
+        metadata (dict): Dictionary containing metadata DataFrames
+
+    Returns:
+        pyarrow.Schema: Schema of the joined table
+    """
+    dtypes = {}
+    for df in metadata.values():
+        for column, dtype in df.dtypes.items():
+            dtypes.setdefault(column, dtype)
+    return pa.schema([(c, _arrow_type(dtypes[c])) for c in _joined_columns(metadata)])
+
+def iter_joined_batches(metadata, selected, batch_rows=BATCH_ROWS):
+    """
+    Join the selected metadata rows on contig code, batch by batch.
+
+    Tables are sorted by contig code (i.e. by contig ID) once, so each batch
+    covers a contiguous code range and its matching rows in the other tables
+    are found by binary search.
+
+    Args:
+        metadata (dict): Dictionary containing metadata DataFrames indexed by contig code
+        selected (dict): Selected rows of each metadata table, same keys as metadata
+        batch_rows (int): Number of quality rows joined per batch
+
+    Yields:
+        pandas.DataFrame: Joined rows, one per quality row and matching
+            viral description and host rows
+    """
+    columns = _joined_columns(metadata)
+    quality = selected['quality'].sort_index(kind='stable')
+    others = []
+    for name in ['viral_desc', 'hosts']:
+        df = selected[name].sort_index(kind='stable')
+        others.append(df[[c for c in df.columns if c not in quality.columns]])
+
+    for start in range(0, len(quality), batch_rows):
+        batch = quality.iloc[start:start + batch_rows]
+        first, last = batch.index[0], batch.index[-1]
+        for extra in others:
+            lo = extra.index.searchsorted(first, 'left')
+            hi = extra.index.searchsorted(last, 'right')
+            batch = batch.join(extra.iloc[lo:hi], how='left')
+        yield batch[columns]
+
+def write_joined_metadata(metadata, selected, output_file, file_format, batch_rows=BATCH_ROWS):
+    """
+    Write the selected metadata as one joined, typed table.
+
+    Rows are converted and written in batches, so only one batch of the
+    joined table is held in memory at a time.
+
+    Args:
+        metadata (dict): Dictionary containing metadata DataFrames indexed by contig code
+        selected (dict): Selected rows of each metadata table, same keys as metadata
+        output_file (str or Path): Path to output file
+        file_format (str): 'parquet' or 'arrow' (Arrow IPC file)
+        batch_rows (int): Number of rows per batch (and per Parquet row group)
+
+    Returns:
+        int: Number of rows written
+
+    Raises:
+        RuntimeError: If pyarrow is missing or writing fails
+    """
+    available, msg = columnar_available()
+    if not available:
+        raise RuntimeError(msg)
+
+    schema = joined_schema(metadata)
+    rows = 0
+    try:
+        if file_format == 'parquet':
+            writer = pq.ParquetWriter(str(output_file), schema)
+        else:
+            writer = pa.ipc.new_file(str(output_file), schema)
+        with writer:
+            for batch in iter_joined_batches(metadata, selected, batch_rows):
+                table = pa.Table.from_pandas(batch, schema=schema, preserve_index=False)
+                writer.write_table(table)
+                rows += len(batch)
+        return rows
+    except (pa.ArrowException, OSError) as e:
+        raise RuntimeError(f"Error writing {file_format} metadata: {str(e)}")
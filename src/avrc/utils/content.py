@@ -0,0 +1,218 @@
+# src/avrc/utils/content.py
+"""Sequence content filters applied while streaming extracted FASTA records."""
+
+import gzip
+import hashlib
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+COMPLEMENT = bytes.maketrans(b'ACGTRYKMBVDHN', b'TGCAYRMKVBHDN')
+
+# gzip level of the filtered output, same as seqkit's default
+COMPRESS_LEVEL = 6
+
+# FASTA line width of the filtered output, same as seqkit's default
+LINE_WIDTH = 60
+
+def make_content_filter(min_gc=None, max_gc=None, max_n_fraction=None, motif=None):
+    """
+    Build a predicate on sequence content.
+
+    GC content is the fraction of G and C among unambiguous (A, C, G, T) bases.
+    Motifs are matched case-insensitively on both strands.
+
+    Args:
+        min_gc (float, optional): Minimum GC fraction
+        max_gc (float, optional): Maximum GC fraction
+        max_n_fraction (float, optional): Maximum fraction of N bases
+        motif (str, optional): Motif that must occur in the sequence
+
+    Returns:
+        callable: Function taking an uppercase sequence (bytes) and returning
+            True to keep it, or None if no content filter is requested
+    """
+    if min_gc is None and max_gc is None and max_n_fraction is None and not motif:
+        return None
+
+    motifs = set()
+    if motif:
+        motif = motif.upper().encode()
+        motifs = {motif, motif.translate(COMPLEMENT)[::-1]}
+
+    def keep(sequence):
+        length = len(sequence)
+        if max_n_fraction is not None and sequence.count(b'N') > max_n_fraction * length:
+            return False
+        if min_gc is not None or max_gc is not None:
+            gc = sequence.count(b'G') + sequence.count(b'C')
+            acgt = gc + sequence.count(b'A') + sequence.count(b'T')
+            gc_fraction = gc / acgt if acgt else 0.0
+            if min_gc is not None and gc_fraction < min_gc:
+                return False
+            if max_gc is not None and gc_fraction > max_gc:
+                return False
+        if motifs and not any(m in sequence for m in motifs):
+            return False
+        return True
+
+    return keep
+
+def sequence_digest(sequence):
+    """
+    Get a 64-bit digest of an uppercase sequence for duplicate removal.
+
+    Args:
+        sequence (bytes): Uppercase sequence
+
+    Returns:
+        int: Sequence digest
+    """
+    return int.from_bytes(hashlib.blake2b(sequence, digest_size=8).digest(), 'little')
+
+def filter_fasta_stream(stream, output, keep=None, dedup=False, line_width=LINE_WIDTH):
+    """
+    Copy FASTA records passing a content predicate from a stream.
+
+    The predicate sees an uppercase copy of each sequence, records are
+    written with their original bytes so soft-masked bases are kept, wrapped
+    like seqkit output.
+
+    Args:
+        stream (file): Binary FASTA input
+        output (file): Binary output
+        keep (callable, optional): Predicate from make_content_filter
+        dedup (bool): Compute sequence digests of the records written
+        line_width (int): Sequence line width, 0 for no wrapping
+
+    Returns:
+        list: (ID, digest) of the records written, digests are None unless dedup
+    """
+    records = []
+    header = None
+    lines = []
+
+    def flush():
+        sequence = b''.join(lines)
+        upper = sequence.upper()
+        if keep is None or keep(upper):
+            output.write(header)
+            step = line_width or len(sequence) or 1
+            for start in range(0, len(sequence), step):
+                output.write(sequence[start:start + step] + b'\n')
+            records.append((header[1:].split(None, 1)[0].decode(),
+                            sequence_digest(upper) if dedup else None))
+
+    for line in stream:
+        if line.startswith(b'>'):
+            if header is not None:
+                flush()
+            header = line if line.endswith(b'\n') else line + b'\n'
+            lines = []
+        else:
+            lines.append(line.rstrip())
+    if header is not None:
+        flush()
+    return records
+
+def _open_output(raw):
+    """Open a gzip writer with a fixed header, so identical runs give identical files."""
+    return gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0,
+                         compresslevel=COMPRESS_LEVEL)
+
+def _filter_part(input_file, part_file, id_list_file, keep, dedup, threads):
+    """Extract one sequence file with seqkit and filter its records into a gzip part."""
+    cmd = ['seqkit', 'grep', '-w', '0', '-f', str(id_list_file), str(input_file)]
+    if threads:
+        cmd += ['-j', str(threads)]
+    with open(part_file, 'wb') as raw, _open_output(raw) as output:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+        try:
+            records = filter_fasta_stream(proc.stdout, output, keep, dedup)
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return records
+
+def _drop_records(part_file, positions):
+    """Rewrite a gzip FASTA part without the records at the given positions."""
+    temp_file = part_file.with_name(f".dedup{part_file.name}")
+    index = -1
+    with gzip.open(part_file, 'rb') as source, open(temp_file, 'wb') as raw, \
+            _open_output(raw) as output:
+        for line in source:
+            if line.startswith(b'>'):
+                index += 1
+            if index not in positions:
+                output.write(line)
+    os.replace(temp_file, part_file)
+
+def filter_sequences_by_content(input_files, output_file, id_list_file, keep=None, dedup=False,
+                                processes=1, threads=None):
+    """
+    Extract sequences by ID with seqkit and apply content filters in the same pass.
+
+    Each input file is extracted by its own seqkit process and its records
+    are filtered as they arrive, so the catalogue is read only once. Up to
+    ``processes`` input files are filtered concurrently into separate gzip
+    parts. Duplicates are removed afterwards in input order, so the first
+    occurrence across all inputs is kept whichever worker finishes first,
+    and the parts are concatenated in input order.
+
+    Args:
+        input_files (list): Sequence files (catalogue or its shards) in order
+        output_file (str or Path): Path to gzip-compressed output file
+        id_list_file (str or Path): Path to file containing sequence IDs to keep
+        keep (callable, optional): Predicate from make_content_filter
+        dedup (bool): Drop sequences identical to an earlier one
+        processes (int): Number of input files filtered concurrently
+        threads (int, optional): Number of worker threads of each seqkit process
+
+    Returns:
+        list: IDs of the sequences written
+
+    Raises:
+        RuntimeError: If seqkit command fails
+    """
+    output_file = Path(output_file)
+    part_files = [
+        output_file.with_name(f".part_{i:04d}.{output_file.name}")
+        for i in range(len(input_files))
+    ]
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, processes)) as pool:
+            futures = [
+                pool.submit(_filter_part, input_file, part, id_list_file, keep, dedup, threads)
+                for input_file, part in zip(input_files, part_files)
+            ]
+            results = [future.result() for future in futures]
+
+        kept_ids = []
+        seen = set()
+        for part, records in zip(part_files, results):
+            duplicates = set()
+            for position, (seq_id, digest) in enumerate(records):
+                if dedup:
+                    if digest in seen:
+                        duplicates.add(position)
+                        continue
+                    seen.add(digest)
+                kept_ids.append(seq_id)
+            if duplicates:
+                _drop_records(part, duplicates)
+
+        with open(output_file, 'wb') as out:
+            for part in part_files:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out, 1024*1024)
+        return kept_ids
+    except (OSError, subprocess.SubprocessError) as e:
+        raise RuntimeError(f"Error filtering sequences with seqkit: {str(e)}")
+    finally:
+        for part in part_files:
+            if part.exists():
+                part.unlink()
@@ -0,0 +1,266 @@
+# src/avrc/utils/iddict.py
+"""Compact contig ID dictionary backed by a sorted, memory-mapped string table."""
+
+import gzip
+import re
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from .manifest import input_fingerprint, temp_output_path, cache_is_current, commit_cache
+
+ID_TABLE_NAME = 'AvRCv1.ContigIds.npy'
+
+class ContigIdDict:
+    """
+    Map contig IDs to dense integer codes.
+
+    IDs are kept in a sorted fixed-width byte array, so the code of an ID is
+    its position in the table. Saved tables are loaded with ``mmap_mode='r'``,
+    which lets several processes share the same pages without copying.
+
+    Args:
+        table (numpy.ndarray): Sorted array of unique IDs with a bytes dtype
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    @classmethod
+    def from_ids(cls, ids):
+        """
+        Build a dictionary from an iterable of contig IDs.
+
+        Args:
+            ids (iterable): Contig IDs, duplicates are allowed
+
+        Returns:
+            ContigIdDict: Dictionary holding the unique IDs
+        """
+        values = pd.Series(list(ids), dtype=object).astype(str)
+        return cls(np.unique(values.str.encode('utf-8').to_numpy(dtype=bytes)))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map a dictionary saved with save().
+
+        Args:
+            path (str or Path): Path to the ``.npy`` string table
+
+        Returns:
+            ContigIdDict: Dictionary backed by the memory-mapped table
+        """
+        return cls(np.load(path, mmap_mode='r'))
+
+    def save(self, path):
+        """
+        Save the string table as a ``.npy`` file.
+
+        Args:
+            path (str or Path): Destination path
+        """
+        with open(path, 'wb') as f:
+            np.save(f, np.asarray(self.table))
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, contig_id):
+        return bool(self.encode([contig_id])[0] >= 0)
+
+    def __iter__(self):
+        return iter(self.decode(np.arange(len(self), dtype=np.int32)))
+
+    def encode(self, ids):
+        """
+        Get the integer codes of contig IDs.
+
+        Args:
+            ids (iterable): Contig IDs to encode, or a numpy bytes array of
+                UTF-8 encoded IDs
+
+        Returns:
+            numpy.ndarray: int32 codes, -1 for IDs missing from the dictionary
+        """
+        if isinstance(ids, np.ndarray) and ids.dtype.kind == 'S':
+            values = ids
+        else:
+            values = pd.Series(ids, dtype=object).fillna('').astype(str)
+            values = values.str.encode('utf-8').to_numpy(dtype=bytes)
+        codes = np.full(len(values), -1, dtype=np.int32)
+        if len(self.table) == 0 or len(values) == 0:
+            return codes
+        pos = np.searchsorted(self.table, values)
+        pos[pos == len(self.table)] = 0
+        found = self.table[pos] == values
+        codes[found] = pos[found]
+        return codes
+
+    def decode(self, codes):
+        """
+        Get the contig IDs for integer codes.
+
+        Args:
+            codes (array-like): Codes returned by encode()
+
+        Returns:
+            list: Contig IDs as strings
+        """
+        return [value.decode('utf-8') for value in self.table[np.asarray(codes)]]
+
+    def bitmap(self, codes=None):
+        """
+        Build a boolean bitmap over the dictionary.
+
+        Args:
+            codes (array-like, optional): Codes to set, negative codes are ignored
+
+        Returns:
+            numpy.ndarray: Boolean array with one entry per contig ID
+        """
+        bitmap = np.zeros(len(self), dtype=bool)
+        if codes is not None:
+            codes = np.asarray(codes)
+            bitmap[codes[codes >= 0]] = True
+        return bitmap
+
+class VotuMap:
+    """
+    Map vOTU IDs to the codes of their representative contigs.
+
+    The mapping is built on first use only, so runs that never map vOTU IDs
+    do not read the sequence table. It is held as a dictionary of vOTU IDs
+    and an aligned int32 array of representative codes.
+
+    Args:
+        id_dict (ContigIdDict): Representative contig ID dictionary
+        pairs_loader (callable): Returns a DataFrame with 'vOTU_ID' and
+            'contig_id' columns of representative contigs
+    """
+
+    def __init__(self, id_dict, pairs_loader):
+        self.id_dict = id_dict
+        self.pairs_loader = pairs_loader
+        self.votu_ids = None
+        self.rep_codes = None
+
+    def _load(self):
+        """Build the vOTU dictionary and representative codes."""
+        if self.votu_ids is None:
+            pairs = self.pairs_loader()
+            votu_ids = ContigIdDict.from_ids(pairs['vOTU_ID'])
+            rep_codes = np.full(len(votu_ids), -1, dtype=np.int32)
+            rep_codes[votu_ids.encode(pairs['vOTU_ID'])] = self.id_dict.encode(pairs['contig_id'])
+            self.votu_ids, self.rep_codes = votu_ids, rep_codes
+
+    def encode(self, ids):
+        """
+        Get the representative contig codes of vOTU IDs.
+
+        Args:
+            ids (iterable): vOTU IDs to encode
+
+        Returns:
+            numpy.ndarray: int32 codes, -1 for IDs that are not known vOTUs
+        """
+        self._load()
+        votu_codes = self.votu_ids.encode(ids)
+        codes = np.full(len(votu_codes), -1, dtype=np.int32)
+        found = votu_codes >= 0
+        codes[found] = self.rep_codes[votu_codes[found]]
+        return codes
+
+    def __getitem__(self, votu_id):
+        code = self.encode([votu_id])[0]
+        if code < 0:
+            raise KeyError(votu_id)
+        return self.id_dict.decode([code])[0]
+
+def load_id_dict(input_dir, ids_loader):
+    """
+    Load the cached contig ID dictionary, rebuilding it if stale.
+
+    The table is cached next to the sequence table together with the size
+    and mtime of the sequence table it was built from, and rebuilt whenever
+    they differ. Failing to write the cache (e.g. read-only data directory)
+    is not an error.
+
+    Args:
+        input_dir (str or Path): Path to input directory containing metadata files
+        ids_loader (callable): Returns the contig IDs when the cache must be rebuilt
+
+    Returns:
+        ContigIdDict: Contig ID dictionary
+    """
+    input_dir = Path(input_dir)
+    cache_path = input_dir / ID_TABLE_NAME
+    fingerprint = input_fingerprint(input_dir, ['AvRCv1.SequenceTable.csv'])
+    if cache_is_current(cache_path, fingerprint):
+        return ContigIdDict.load(cache_path)
+
+    id_dict = ContigIdDict.from_ids(ids_loader())
+    temp_path = temp_output_path(cache_path)
+    try:
+        id_dict.save(temp_path)
+        commit_cache(temp_path, cache_path, fingerprint)
+    except OSError:
+        pass  # Non-critical, the dictionary is rebuilt next time
+    return id_dict
+
+# First field of a line, cut on commas, tabs or spaces, without quotes
+FIRST_FIELD = re.compile(rb'^[ \t]*"?([^\s,"]+)', re.MULTILINE)
+
+def _decompressed(raw):
+    """Wrap a binary file in a gzip reader if it starts with the gzip magic bytes."""
+    if raw.peek(2)[:2] == b'\x1f\x8b':
+        return gzip.GzipFile(fileobj=raw)
+    return raw
+
+def read_id_list(path, id_dict, votu_map=None, chunk_size=64*1024*1024):
+    """
+    Stream an ID list file into a bitmap over a contig ID dictionary.
+
+    The file is read in chunks and each chunk is encoded to integer codes
+    right away, so memory use does not grow with the number of IDs listed.
+    Gzip compression is detected from the file content. Only the first
+    field of each line is used, cut on commas, tabs or spaces, so plain
+    lists, CSV and TSV files are supported; lines that are not known IDs
+    (e.g. a header) are ignored.
+
+    Args:
+        path (str or Path): Path to the ID list file
+        id_dict (ContigIdDict): Dictionary to encode the IDs with
+        votu_map (VotuMap, optional): Map vOTU IDs to their representative contig
+        chunk_size (int): Number of bytes read per chunk
+
+    Returns:
+        tuple: (numpy.ndarray bitmap of listed IDs, int IDs read, int IDs matched)
+    """
+    bitmap = id_dict.bitmap()
+    total = matched = 0
+    try:
+        with open(path, 'rb') as raw, _decompressed(raw) as f:
+            rest = b''
+            while True:
+                block = f.read(chunk_size)
+                data = rest + block
+                if block:
+                    # Keep the last incomplete line for the next chunk
+                    cut = data.rfind(b'\n') + 1
+                    data, rest = data[:cut], data[cut:]
+                ids = np.array(FIRST_FIELD.findall(data), dtype=bytes)
+                if len(ids):
+                    codes = id_dict.encode(ids)
+                    if votu_map is not None:
+                        votu_codes = votu_map.encode(ids)
+                        codes = np.where(votu_codes >= 0, votu_codes, codes)
+                    total += len(codes)
+                    matched += int((codes >= 0).sum())
+                    bitmap[codes[codes >= 0]] = True
+                if not block:
+                    break
+    except Exception as e:
+        raise RuntimeError(f"Error reading ID list {path}: {str(e)}")
+    return bitmap, total, matched
@@ -0,0 +1,199 @@
+# src/avrc/utils/manifest.py
+"""Output manifest utilities for reproducible AVrC filter runs."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .. import __version__
+
+MANIFEST_NAME = 'filter_manifest.json'
+
+def file_digest(file_path, algorithm='sha256', chunk_size=1024*1024):
+    """
+    Compute the digest of a file by streaming it in chunks.
+
+    Args:
+        file_path (str or Path): Path to the file to hash
+        algorithm (str): Name of a hashlib algorithm
+        chunk_size (int): Number of bytes read per iteration
+
+    Returns:
+        str: Hexadecimal digest of the file content
+    """
+    digest = hashlib.new(algorithm)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def input_fingerprint(input_dir, filenames):
+    """
+    Fingerprint the input dataset from file sizes and modification times.
+
+    Hashing the full catalogue would cost as much as the extraction itself,
+    so the fingerprint relies on file metadata only.
+
+    Args:
+        input_dir (str or Path): Directory containing the AVrC files
+        filenames (list): Names of the input files to include
+
+    Returns:
+        dict: Per-file size and mtime, plus a combined fingerprint digest
+    """
+    files = {}
+    for name in sorted(filenames):
+        path = Path(input_dir) / name
+        if path.exists():
+            stat = path.stat()
+            files[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    encoded = json.dumps(files, sort_keys=True).encode()
+    return {'files': files, 'fingerprint': hashlib.sha256(encoded).hexdigest()}
+
+def temp_output_path(output_path):
+    """
+    Get a temporary path next to an output file.
+
+    The temporary file keeps the original name as suffix so tools that pick
+    the output format from the extension (e.g. seqkit and ``.gz``) behave
+    the same, and lives in the same directory so the final rename is atomic.
+
+    Args:
+        output_path (str or Path): Final output path
+
+    Returns:
+        Path: Temporary path for the output
+    """
+    output_path = Path(output_path)
+    return output_path.with_name(f".tmp-{os.getpid()}-{output_path.name}")
+
+def commit_output(temp_path, output_path):
+    """
+    Atomically move a temporary output into place unless it is unchanged.
+
+    If the existing output has the same content as the temporary file, the
+    temporary file is discarded and the existing file (and its mtime) is kept,
+    so downstream workflow managers do not see a spurious change.
+
+    Args:
+        temp_path (str or Path): Path to the freshly written output
+        output_path (str or Path): Final output path
+
+    Returns:
+        tuple: (str, bool) - (sha256 digest of the output, True if it was rewritten)
+    """
+    temp_path = Path(temp_path)
+    output_path = Path(output_path)
+    digest = file_digest(temp_path)
+
+    if (output_path.exists()
+            and output_path.stat().st_size == temp_path.stat().st_size
+            and file_digest(output_path) == digest):
+        temp_path.unlink()
+        return digest, False
+
+    os.replace(temp_path, output_path)
+    return digest, True
+
+def cache_fingerprint_path(cache_path):
+    """
+    Get the path recording the input fingerprint of a cache file.
+
+    Args:
+        cache_path (str or Path): Path to the cache file
+
+    Returns:
+        Path: Sidecar JSON path next to the cache file
+    """
+    cache_path = Path(cache_path)
+    return cache_path.with_name(f"{cache_path.name}.source.json")
+
+def cache_is_current(cache_path, fingerprint):
+    """
+    Check whether a cache file was built from the given inputs.
+
+    Archive extraction keeps the modification times stored in the archive,
+    so replaced inputs can look older than the cache. The cache is only
+    reused when the recorded fingerprint matches exactly.
+
+    Args:
+        cache_path (str or Path): Path to the cache file
+        fingerprint (dict): Current input fingerprint from input_fingerprint
+
+    Returns:
+        bool: True if the cache exists and was built from the same inputs
+    """
+    try:
+        with open(cache_fingerprint_path(cache_path)) as f:
+            recorded = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return Path(cache_path).exists() and recorded == fingerprint
+
+def commit_cache(temp_path, cache_path, fingerprint):
+    """
+    Move a freshly built cache file into place and record its inputs.
+
+    The cache is replaced before its fingerprint, so an interrupted commit
+    leaves a fingerprint that does not match and the cache is rebuilt.
+
+    Args:
+        temp_path (str or Path): Path to the freshly written cache
+        cache_path (str or Path): Final cache path
+        fingerprint (dict): Input fingerprint the cache was built from
+
+    Raises:
+        OSError: If the cache or its fingerprint cannot be written
+    """
+    fingerprint_path = cache_fingerprint_path(cache_path)
+    temp_fingerprint = temp_output_path(fingerprint_path)
+    with open(temp_fingerprint, 'w') as f:
+        json.dump(fingerprint, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(temp_path, cache_path)
+    os.replace(temp_fingerprint, fingerprint_path)
+
+def remove_manifest(output_dir):
+    """
+    Remove the manifest of a previous run from the output directory.
+
+    Called before any output is replaced, so a run failing halfway does not
+    leave an old manifest describing a mix of old and new outputs.
+
+    Args:
+        output_dir (str or Path): Output directory
+    """
+    manifest_path = Path(output_dir) / MANIFEST_NAME
+    if manifest_path.exists():
+        manifest_path.unlink()
+
+def write_manifest(output_dir, parameters, fingerprint, outputs):
+    """
+    Write the filter run manifest to the output directory.
+
+    The manifest holds no timestamps, so re-running the same filter on the
+    same inputs leaves it untouched as well.
+
+    Args:
+        output_dir (str or Path): Output directory
+        parameters (dict): Filter parameters used for the run
+        fingerprint (dict): Input dataset fingerprint from input_fingerprint
+        outputs (dict): Output file name mapped to its sha256, size and record count
+
+    Returns:
+        Path: Path to the manifest file
+    """
+    manifest = {
+        'avrc_version': __version__,
+        'parameters': parameters,
+        'input': fingerprint,
+        'outputs': outputs
+    }
+    manifest_path = Path(output_dir) / MANIFEST_NAME
+    temp_path = temp_output_path(manifest_path)
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    commit_output(temp_path, manifest_path)
+    return manifest_path
@@ -1,123 +1,268 @@
+# src/avrc/utils/metadata.py
 """Metadata handling utilities for AVrC data."""
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from .iddict import ContigIdDict, VotuMap, load_id_dict
+
+def _read_representatives(input_dir, columns):
+    """Read the sequence table rows of representative contigs."""
+    seq_table = pd.read_csv(
+        Path(input_dir) / 'AvRCv1.SequenceTable.csv',
+        usecols=['contig_id', 'representative'] + columns,
+        dtype=str
+    )
+    return seq_table[seq_table['contig_id'] == seq_table['representative']]
 
 def load_sequence_mapping(input_dir):
     """
     Load sequence mapping table and get representative sequences.
     
+    The sequence table is only read when the cached contig ID dictionary is
+    stale, and for the vOTU mapping when it is first used.
+    
     Args:
         input_dir (str): Path to input directory containing metadata files
         
     Returns:
-        tuple: (set of representative IDs, dict mapping vOTU_ID to representative ID)
+        tuple: (ContigIdDict of representative IDs, VotuMap from vOTU_ID to representative)
     """
     try:
-        seq_table = pd.read_csv(Path(input_dir) / 'AvRCv1.SequenceTable.csv')
-        votu_to_rep = seq_table[seq_table['contig_id'] == seq_table['representative']][['vOTU_ID', 'contig_id']]
-        return set(votu_to_rep['contig_id']), dict(zip(votu_to_rep['vOTU_ID'], votu_to_rep['contig_id']))
+        representative_ids = load_id_dict(
+            input_dir, lambda: _read_representatives(input_dir, [])['contig_id']
+        )
+        votu_map = VotuMap(representative_ids,
+                           lambda: _read_representatives(input_dir, ['vOTU_ID']))
+        return representative_ids, votu_map
     except Exception as e:
         raise RuntimeError(f"Error loading sequence mapping: {str(e)}")
 
+def _load_table(path, usecols, representative_ids):
+    """Load a metadata table indexed by contig code, keeping representatives only."""
+    df = pd.read_csv(path, usecols=usecols)
+    codes = representative_ids.encode(df['contig_id'])
+    df.index = pd.Index(codes, name='contig_code')
+    return df[codes >= 0]
+
 def load_metadata(input_dir, representative_ids):
     """
     Load metadata only for representative sequences.
     
+    Each table is indexed by the integer code of its contig in the
+    representative ID dictionary, so filters can work on code bitmaps.
+    
     Args:
         input_dir (str): Path to input directory containing metadata files
-        representative_ids (set): Set of representative sequence IDs to filter for
+        representative_ids (ContigIdDict or set): Representative sequence IDs to filter for
         
     Returns:
         dict: Dictionary containing filtered metadata DataFrames
     """
+    if not isinstance(representative_ids, ContigIdDict):
+        representative_ids = ContigIdDict.from_ids(representative_ids)
+
     metadata = {}
     try:
         # Load and pre-filter quality data
-        metadata['quality'] = pd.read_csv(
+        metadata['quality'] = _load_table(
             Path(input_dir) / 'AvRCv1.Merged_Quality.csv', 
-            usecols=['contig_id', 'vOTU_ID', 'checkv_quality', 'contig_length', 'Plasmid']
+            ['contig_id', 'vOTU_ID', 'checkv_quality', 'contig_length', 'Plasmid'],
+            representative_ids
         )
-        metadata['quality'] = metadata['quality'][
-            metadata['quality']['contig_id'].isin(representative_ids)
-        ]
         
         # Load and pre-filter viral description data
-        metadata['viral_desc'] = pd.read_csv(
+        metadata['viral_desc'] = _load_table(
             Path(input_dir) / 'AvRCv1.Merged_ViralDesc.csv', 
-            usecols=['contig_id', 'vOTU_ID', 'pred_lifestyle', 'Realm', 'Phylum', 'Class']
+            ['contig_id', 'vOTU_ID', 'pred_lifestyle', 'Realm', 'Phylum', 'Class'],
+            representative_ids
         )
-        metadata['viral_desc'] = metadata['viral_desc'][
-            metadata['viral_desc']['contig_id'].isin(representative_ids)
-        ]
         
         # Load and pre-filter host prediction data
-        metadata['hosts'] = pd.read_csv(
+        metadata['hosts'] = _load_table(
             Path(input_dir) / 'AvRCv1.Merged_PredictedHosts.csv', 
-            usecols=['contig_id', 'vOTU_ID', 'Host_Domain', 'Host_Phylum', 'Host_Genus']
+            ['contig_id', 'vOTU_ID', 'Host_Domain', 'Host_Phylum', 'Host_Genus'],
+            representative_ids
         )
-        metadata['hosts'] = metadata['hosts'][
-            metadata['hosts']['contig_id'].isin(representative_ids)
-        ]
         
         return metadata
     except Exception as e:
         raise RuntimeError(f"Error loading metadata: {str(e)}")
 
-def apply_filters(metadata, **filter_params):
+def _contains(series, pattern):
+    """Case-insensitive substring match treating missing values as empty."""
+    return series.fillna('').str.contains(pattern, case=False)
+
+# Filter criteria as (parameter, metadata table, function building a row mask)
+FILTER_CRITERIA = [
+    ('quality', 'quality', lambda df, v: df['checkv_quality'] == v),
+    ('min_length', 'quality', lambda df, v: df['contig_length'] >= v),
+    ('no_plasmids', 'quality', lambda df, v: ~df['Plasmid']),
+    ('realm', 'viral_desc', lambda df, v: _contains(df['Realm'], v)),
+    ('phylum', 'viral_desc', lambda df, v: _contains(df['Phylum'], v)),
+    ('class', 'viral_desc', lambda df, v: _contains(df['Class'], v)),
+    ('lifestyle', 'viral_desc', lambda df, v: df['pred_lifestyle'] == v),
+    ('host_domain', 'hosts', lambda df, v: _contains(df['Host_Domain'], v)),
+    ('host_phylum', 'hosts', lambda df, v: _contains(df['Host_Phylum'], v)),
+    ('host_genus', 'hosts', lambda df, v: _contains(df['Host_Genus'], v)),
+]
+
+def _bitmap_size(metadata):
+    """Get the bitmap size covering the contig codes of all metadata tables."""
+    return max((int(df.index.max()) + 1 for df in metadata.values() if len(df)), default=0)
+
+def _codes_bitmap(codes, size):
+    """Build a boolean bitmap with the given contig codes set."""
+    bitmap = np.zeros(size, dtype=bool)
+    bitmap[np.asarray(codes)] = True
+    return bitmap
+
+def criterion_masks(metadata, **filter_params):
     """
-    Apply filters to metadata and return filtered sequence IDs.
+    Build one contig code bitmap per active filter criterion.
+    
+    Besides the metadata criteria, ``include_ids`` and ``exclude_ids`` accept
+    bitmaps of listed contig codes (see read_id_list).
     
     Args:
         metadata (dict): Dictionary containing metadata DataFrames
         **filter_params: Filter parameters as keyword arguments
         
     Returns:
-        set: Set of sequence IDs passing all filters
+        list: (parameter name, boolean bitmap indexed by contig code) tuples
     """
-    filtered_ids = set(metadata['quality']['contig_id'])
-    
-    # Quality filters
-    quality = metadata['quality']
-    if filter_params.get('quality'):
-        filtered_ids &= set(quality[quality['checkv_quality'] == filter_params['quality']]['contig_id'])
-    
-    if filter_params.get('min_length'):
-        filtered_ids &= set(quality[quality['contig_length'] >= filter_params['min_length']]['contig_id'])
+    size = _bitmap_size(metadata)
+    masks = []
+    for param, table, build_mask in FILTER_CRITERIA:
+        value = filter_params.get(param)
+        if value:
+            df = metadata[table]
+            masks.append((param, _codes_bitmap(df.index[build_mask(df, value).to_numpy()], size)))
     
-    if filter_params.get('no_plasmids'):
-        filtered_ids &= set(quality[~quality['Plasmid']]['contig_id'])
-    
-    # Taxonomy/lifestyle filters
-    viral_desc = metadata['viral_desc']
-    if filter_params.get('realm'):
-        realm_mask = viral_desc['Realm'].fillna('').str.contains(filter_params['realm'], case=False)
-        filtered_ids &= set(viral_desc[realm_mask]['contig_id'])
-    
-    if filter_params.get('phylum'):
-        phylum_mask = viral_desc['Phylum'].fillna('').str.contains(filter_params['phylum'], case=False)
-        filtered_ids &= set(viral_desc[phylum_mask]['contig_id'])
+    # ID list bitmaps cover the whole ID dictionary, the metadata may use fewer codes
+    if filter_params.get('include_ids') is not None:
+        masks.append(('include_ids', filter_params['include_ids'][:size]))
+    if filter_params.get('exclude_ids') is not None:
+        masks.append(('exclude_ids', ~filter_params['exclude_ids'][:size]))
+    return masks
+
+def apply_filters_mask(metadata, **filter_params):
+    """
+    Apply filters to metadata and return a contig code bitmap.
     
-    if filter_params.get('class'):
-        class_mask = viral_desc['Class'].fillna('').str.contains(filter_params['class'], case=False)
-        filtered_ids &= set(viral_desc[class_mask]['contig_id'])
+    Args:
+        metadata (dict): Dictionary containing metadata DataFrames
+        **filter_params: Filter parameters as keyword arguments
+        
+    Returns:
+        numpy.ndarray: Boolean bitmap indexed by contig code, True for passing sequences
+    """
+    mask = _codes_bitmap(metadata['quality'].index, _bitmap_size(metadata))
+    for _, criterion_mask in criterion_masks(metadata, **filter_params):
+        mask &= criterion_mask
+    return mask
+
+def select_rows(df, mask):
+    """
+    Select metadata rows whose contig code is set in a bitmap.
     
-    if filter_params.get('lifestyle'):
-        lifestyle_mask = viral_desc['pred_lifestyle'] == filter_params['lifestyle']
-        filtered_ids &= set(viral_desc[lifestyle_mask]['contig_id'])
+    Args:
+        df (pandas.DataFrame): Metadata table indexed by contig code
+        mask (numpy.ndarray): Boolean bitmap indexed by contig code
+        
+    Returns:
+        pandas.DataFrame: Selected rows
+    """
+    return df[mask[df.index.to_numpy()]]
+
+def apply_filters(metadata, **filter_params):
+    """
+    Apply filters to metadata and return filtered sequence IDs.
     
-    # Host filters
-    hosts = metadata['hosts']
-    if filter_params.get('host_domain'):
-        domain_mask = hosts['Host_Domain'].fillna('').str.contains(filter_params['host_domain'], case=False)
-        filtered_ids &= set(hosts[domain_mask]['contig_id'])
+    Args:
+        metadata (dict): Dictionary containing metadata DataFrames
+        **filter_params: Filter parameters as keyword arguments
+        
+    Returns:
+        set: Set of sequence IDs passing all filters
+    """
+    mask = apply_filters_mask(metadata, **filter_params)
+    return set(select_rows(metadata['quality'], mask)['contig_id'])
+
+def restrict_mask(mask, codes):
+    """
+    Restrict a contig code bitmap to the given codes.
     
-    if filter_params.get('host_phylum'):
-        phylum_mask = hosts['Host_Phylum'].fillna('').str.contains(filter_params['host_phylum'], case=False)
-        filtered_ids &= set(hosts[phylum_mask]['contig_id'])
+    Args:
+        mask (numpy.ndarray): Boolean bitmap indexed by contig code
+        codes (array-like): Contig codes to keep, negative codes are ignored
+        
+    Returns:
+        numpy.ndarray: Bitmap with only the given codes left set
+    """
+    codes = np.asarray(codes)
+    codes = codes[(codes >= 0) & (codes < len(mask))]
+    return mask & _codes_bitmap(codes, len(mask))
+
+def _find_column(metadata, column):
+    """Find the metadata table holding a column, matched case-insensitively."""
+    for name, df in metadata.items():
+        for candidate in df.columns:
+            if candidate.lower() == column.lower():
+                return name, candidate
+    available = sorted({c for df in metadata.values() for c in df.columns})
+    raise ValueError(f"Unknown column '{column}', available columns: {', '.join(available)}")
+
+def sample_mask(metadata, mask, n=None, fraction=None, stratify_by=None, seed=None):
+    """
+    Randomly subsample the sequences set in a contig code bitmap.
     
-    if filter_params.get('host_genus'):
-        genus_mask = hosts['Host_Genus'].fillna('').str.contains(filter_params['host_genus'], case=False)
-        filtered_ids &= set(hosts[genus_mask]['contig_id'])
+    Every candidate gets a random key, and the candidates with the smallest
+    keys are kept, overall or within each stratum. The same seed and
+    candidates always give the same sample.
     
-    return filtered_ids
+    Args:
+        metadata (dict): Dictionary containing metadata DataFrames indexed by contig code
+        mask (numpy.ndarray): Boolean bitmap of candidate sequences
+        n (int, optional): Number of sequences to keep (per stratum if stratified)
+        fraction (float, optional): Fraction of sequences to keep (per stratum if stratified),
+            sample sizes are rounded half up
+        stratify_by (str, optional): Metadata column defining the strata,
+            missing values form their own stratum
+        seed (int, optional): Random seed
+        
+    Returns:
+        numpy.ndarray: Bitmap of the sampled sequences
+        
+    Raises:
+        ValueError: If neither or both of n and fraction are given, or the
+            stratification column does not exist
+    """
+    if (n is None) == (fraction is None):
+        raise ValueError("Specify exactly one of sample size or sample fraction")
+
+    codes = np.flatnonzero(mask)
+    keys = np.random.default_rng(seed).random(len(codes))
+
+    if stratify_by:
+        table, column = _find_column(metadata, stratify_by)
+        df = metadata[table]
+        values = df[column][~df.index.duplicated()].reindex(codes)
+        strata, _ = pd.factorize(values)
+        if len(strata):
+            strata[strata < 0] = strata.max() + 1  # Missing values as their own stratum
+    else:
+        strata = np.zeros(len(codes), dtype=np.int64)
+
+    # Rank candidates by random key within their stratum
+    order = np.lexsort((keys, strata))
+    sizes = np.bincount(strata, minlength=strata.max() + 1 if len(strata) else 0)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    ranks = np.empty(len(codes), dtype=np.int64)
+    ranks[order] = np.arange(len(codes)) - starts[strata[order]]
+
+    if n is not None:
+        limits = np.minimum(sizes, n)
+    else:
+        limits = np.floor(sizes * fraction + 0.5).astype(np.int64)  # Round half up
+    return restrict_mask(mask, codes[ranks < limits[strata]])
@@ -0,0 +1,193 @@
+# src/avrc/utils/plan.py
+"""Filter query plans with output size and extraction time estimates."""
+
+import shutil
+import subprocess
+import time
+import zlib
+
+import numpy as np
+from pathlib import Path
+
+# Compressed bytes sampled from the start of the catalogue for calibration
+CALIBRATION_BYTES = 32*1024*1024
+
+def criterion_selectivity(metadata, masks):
+    """
+    Report how many representatives each filter criterion keeps.
+
+    Args:
+        metadata (dict): Dictionary containing metadata DataFrames indexed by contig code
+        masks (list): (criterion name, bitmap) tuples from criterion_masks
+
+    Returns:
+        tuple: (int number of representatives, list of dicts with the criterion
+            name, sequences matching it alone, its selectivity, and sequences
+            remaining after applying it and all previous criteria)
+    """
+    codes = metadata['quality'].index.to_numpy()
+    size = max([len(m) for _, m in masks] + [int(codes.max()) + 1 if len(codes) else 0])
+    base = np.zeros(size, dtype=bool)
+    base[codes] = True
+    total = int(base.sum())
+
+    rows = []
+    remaining = base.copy()
+    for name, mask in masks:
+        matches = int((base & mask).sum())
+        remaining &= mask
+        rows.append({
+            'criterion': name,
+            'matches': matches,
+            'selectivity': matches / total if total else 0.0,
+            'remaining': int(remaining.sum())
+        })
+    return total, rows
+
+def extraction_model(threads, shards, content_filtering):
+    """
+    Describe how the filter command will extract sequences.
+
+    Without shards a single seqkit process runs with ``threads`` worker
+    threads; with shards up to ``threads`` single-threaded seqkit processes
+    run at once, one per shard. With content filters, records are filtered
+    and compressed again in a single Python process.
+
+    Args:
+        threads (int): Value of the --threads option
+        shards (int): Number of catalogue shards, 0 if unsharded
+        content_filtering (bool): True if content filters are applied
+
+    Returns:
+        dict: 'workers' (concurrent seqkit processes), 'seqkit_threads'
+            (threads of each seqkit process) and 'serial_deflate' (True if
+            the output is compressed by a single process)
+    """
+    if shards:
+        return {'workers': min(threads, shards), 'seqkit_threads': 1,
+                'serial_deflate': content_filtering}
+    return {'workers': 1, 'seqkit_threads': threads, 'serial_deflate': content_filtering}
+
+def _seqkit_read_seconds(sample, threads):
+    """Time seqkit reading a gzip sample, None if seqkit is unavailable or fails."""
+    if not shutil.which('seqkit'):
+        return None
+    cmd = ['seqkit', 'seq', '-n', '-j', str(threads)]
+    start = time.perf_counter()
+    try:
+        # The sample ends mid-member, so seqkit exits with an error at the end
+        result = subprocess.run(cmd, input=sample, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    seconds = time.perf_counter() - start
+    return seconds if result.stdout else None
+
+def calibrate_throughput(sequence_file, sample_bytes=CALIBRATION_BYTES, seqkit_threads=None):
+    """
+    Measure read and write throughput on a sample of the catalogue.
+
+    Reading is timed with seqkit when ``seqkit_threads`` is given and seqkit
+    is installed, as in the extraction itself, and with zlib otherwise.
+    Writing is timed with zlib at level 6, the gzip level of both seqkit and
+    the content filter output.
+
+    Args:
+        sequence_file (str or Path): Path to the gzip-compressed catalogue
+        sample_bytes (int): Number of compressed bytes to sample
+        seqkit_threads (int, optional): Threads of the seqkit process to time
+
+    Returns:
+        dict: 'inflate' in compressed bytes/s, 'deflate' in uncompressed
+            bytes/s and 'reader' ('seqkit' or 'zlib'), or None if the file
+            cannot be sampled
+    """
+    try:
+        with open(sequence_file, 'rb') as f:
+            sample = f.read(sample_bytes)
+    except OSError:
+        return None
+    if not sample:
+        return None
+
+    # Decompress member by member, BGZF and concatenated gzip have many
+    start = time.perf_counter()
+    chunks = []
+    remaining = sample
+    try:
+        while remaining:
+            decompressor = zlib.decompressobj(wbits=31)
+            chunks.append(decompressor.decompress(remaining))
+            remaining = decompressor.unused_data
+    except zlib.error:
+        if not chunks:
+            return None
+    inflate_seconds = time.perf_counter() - start
+    reader = 'zlib'
+    if seqkit_threads:
+        seqkit_seconds = _seqkit_read_seconds(sample, seqkit_threads)
+        if seqkit_seconds is not None:
+            inflate_seconds, reader = seqkit_seconds, 'seqkit'
+
+    data = b''.join(chunks)[:sample_bytes // 4]
+    start = time.perf_counter()
+    zlib.compress(data, 6)
+    deflate_seconds = time.perf_counter() - start
+
+    return {
+        'inflate': len(sample) / max(inflate_seconds, 1e-9),
+        'deflate': len(data) / max(deflate_seconds, 1e-9),
+        'reader': reader
+    }
+
+def estimate_output(metadata, mask, sequence_files, throughput=None, workers=1,
+                    serial_deflate=False):
+    """
+    Estimate the size of the filtered FASTA and the time to extract it.
+
+    Bases come from contig_length in the quality table. The compressed size
+    assumes the selection compresses like the whole catalogue, and the
+    extraction time assumes the whole catalogue is decompressed once, split
+    across workers, and the selection is compressed again, split across
+    workers unless it is compressed by a single process.
+
+    Args:
+        metadata (dict): Dictionary containing metadata DataFrames indexed by contig code
+        mask (numpy.ndarray): Bitmap of selected sequences
+        sequence_files (list): Gzip-compressed catalogue, or its shards
+        throughput (dict, optional): Rates from calibrate_throughput
+        workers (int): Number of parallel extraction workers
+        serial_deflate (bool): The selection is compressed by a single process
+
+    Returns:
+        dict: Estimated sequences, bases, compressed_bytes and seconds
+            (sizes and time are None when they cannot be estimated)
+    """
+    quality = metadata['quality']
+    lengths = quality['contig_length'][~quality.index.duplicated()]
+    selected = lengths[mask[lengths.index.to_numpy()]]
+    catalogue_bases = int(lengths.sum())
+    bases = int(selected.sum())
+
+    estimate = {
+        'sequences': len(selected),
+        'bases': bases,
+        'catalogue_bases': catalogue_bases,
+        'catalogue_bytes': None,
+        'compressed_bytes': None,
+        'seconds': None
+    }
+
+    sequence_files = [Path(f) for f in sequence_files]
+    if not all(f.exists() for f in sequence_files):
+        return estimate
+    catalogue_bytes = sum(f.stat().st_size for f in sequence_files)
+    estimate['catalogue_bytes'] = catalogue_bytes
+    if catalogue_bases:
+        estimate['compressed_bytes'] = int(catalogue_bytes * bases / catalogue_bases)
+    if throughput:
+        workers = max(workers, 1)
+        seconds = catalogue_bytes / throughput['inflate'] / workers
+        seconds += bases / throughput['deflate'] / (1 if serial_deflate else workers)
+        estimate['seconds'] = seconds
+    return estimate
@@ -3,6 +3,7 @@ import subprocess
 import shutil
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def verify_seqkit():
@@ -78,7 +79,7 @@ def count_sequences(file_path):
     except Exception as e:
         raise RuntimeError(f"Error counting sequences: {str(e)}")
 
-def filter_sequences(input_file, output_file, id_list_file):
+def filter_sequences(input_file, output_file, id_list_file, threads=None):
     """
     Filter sequences using seqkit based on ID list.
     
@@ -86,16 +87,82 @@ def filter_sequences(input_file, output_file, id_list_file):
         input_file (str or Path): Path to input sequence file
         output_file (str or Path): Path to output filtered sequence file
         id_list_file (str or Path): Path to file containing sequence IDs to keep
+        threads (int, optional): Number of seqkit worker threads
         
     Raises:
         RuntimeError: If seqkit command fails
     """
+    cmd = [
+        'seqkit', 'grep',
+        '-f', str(id_list_file),
+        str(input_file),
+        '-o', str(output_file)
+    ]
+    if threads:
+        cmd += ['-j', str(threads)]
     try:
-        subprocess.run([
-            'seqkit', 'grep',
-            '-f', str(id_list_file),
-            str(input_file),
-            '-o', str(output_file)
-        ], check=True)
+        subprocess.run(cmd, check=True)
     except subprocess.SubprocessError as e:
-        raise RuntimeError(f"Error filtering sequences with seqkit: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Error filtering sequences with seqkit: {str(e)}")
+
+def find_sequence_shards(shard_dir, sequence_file):
+    """
+    Find the shards of a sequence file in a directory.
+    
+    Shards are looked up with the naming used by ``seqkit split2``,
+    e.g. ``AVrC_allrepresentatives.part_001.fasta.gz``. Shards must hold
+    contiguous runs of records (``split2 -s`` or ``-l``), so that file name
+    order is catalogue order; ``split2 -p`` deals records round-robin and
+    its shards do not merge back into catalogue order.
+    
+    Args:
+        shard_dir (str or Path): Directory containing the shards
+        sequence_file (str or Path): Path or name of the unsharded sequence file
+        
+    Returns:
+        list: Shard paths in file name order, empty if no shards exist
+    """
+    stem, _, suffix = Path(sequence_file).name.partition('.')
+    return sorted(Path(shard_dir).glob(f"{stem}.part_*.{suffix}"))
+
+def filter_sequence_shards(shard_files, output_file, id_list_file, processes=1):
+    """
+    Filter sequence shards in parallel and merge results in shard order.
+    
+    Each shard is filtered by its own seqkit process against the same ID list
+    file, each process loading its own copy of the ID list. Gzip members can
+    be concatenated, so the per-shard outputs are appended to the final
+    output without recompression. The output is in catalogue order only if
+    the shards hold contiguous runs of records (see find_sequence_shards).
+    
+    Args:
+        shard_files (list): Shard paths in catalogue order
+        output_file (str or Path): Path to output filtered sequence file
+        id_list_file (str or Path): Path to file containing sequence IDs to keep
+        processes (int): Number of shards filtered concurrently
+        
+    Raises:
+        RuntimeError: If seqkit fails on any shard
+    """
+    output_file = Path(output_file)
+    part_files = [
+        output_file.with_name(f".part_{i:04d}.{output_file.name}")
+        for i in range(len(shard_files))
+    ]
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, processes)) as pool:
+            futures = [
+                pool.submit(filter_sequences, shard, part, id_list_file, 1)
+                for shard, part in zip(shard_files, part_files)
+            ]
+            for future in futures:
+                future.result()
+        
+        with open(output_file, 'wb') as out:
+            for part in part_files:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out, 1024*1024)
+    finally:
+        for part in part_files:
+            if part.exists():
+                part.unlink()
\ No newline at end of file
@@ -0,0 +1,179 @@
+# src/avrc/utils/summary.py
+"""Pre-aggregated catalogue statistics for AVrC metadata."""
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from .manifest import input_fingerprint, temp_output_path, cache_is_current, commit_cache
+from .metadata import load_sequence_mapping, load_metadata
+
+CUBE_NAME = 'AvRCv1.SummaryCube.csv'
+
+METADATA_FILES = [
+    'AvRCv1.SequenceTable.csv',
+    'AvRCv1.Merged_Quality.csv',
+    'AvRCv1.Merged_ViralDesc.csv',
+    'AvRCv1.Merged_PredictedHosts.csv'
+]
+
+# Summary dimension mapped to its (metadata table, column)
+DIMENSIONS = {
+    'quality': ('quality', 'checkv_quality'),
+    'lifestyle': ('viral_desc', 'pred_lifestyle'),
+    'realm': ('viral_desc', 'Realm'),
+    'phylum': ('viral_desc', 'Phylum'),
+    'class': ('viral_desc', 'Class'),
+    'host_domain': ('hosts', 'Host_Domain'),
+    'host_phylum': ('hosts', 'Host_Phylum'),
+    'host_genus': ('hosts', 'Host_Genus')
+}
+
+# Dimensions pre-aggregated in the cube, every combination of them is stored
+CUBE_DIMENSIONS = ['quality', 'lifestyle', 'phylum', 'host_phylum']
+
+MEASURES = ['sequences', 'total_length', 'min_length', 'q25_length',
+            'median_length', 'q75_length', 'max_length']
+
+def _ordered(dimensions):
+    """Sort dimensions in DIMENSIONS order, dropping duplicates."""
+    return [d for d in DIMENSIONS if d in set(dimensions)]
+
+def join_dimensions(metadata):
+    """
+    Join all summary dimensions and contig lengths into one table.
+
+    Args:
+        metadata (dict): Dictionary containing metadata DataFrames indexed by contig code
+
+    Returns:
+        pandas.DataFrame: One row per contig with contig_length and each dimension,
+            missing values replaced by 'Unknown'
+    """
+    quality = metadata['quality']
+    joined = quality[['contig_length']][~quality.index.duplicated()]
+    for dimension, (table, column) in DIMENSIONS.items():
+        df = metadata[table]
+        values = df[column][~df.index.duplicated()]
+        joined[dimension] = values.reindex(joined.index).fillna('Unknown').astype(str)
+    return joined
+
+def aggregate(joined, dimensions):
+    """
+    Compute sequence counts and length statistics per group.
+
+    Args:
+        joined (pandas.DataFrame): Table from join_dimensions
+        dimensions (list): Dimensions to group by, may be empty
+
+    Returns:
+        pandas.DataFrame: One row per group with the dimensions and MEASURES
+    """
+    dimensions = _ordered(dimensions)
+    if joined.empty:
+        # No groups, but the overall total still reports zero sequences
+        rows = 0 if dimensions else 1
+        result = pd.DataFrame({d: pd.Series(dtype=str) for d in dimensions})
+        for measure in MEASURES:
+            if measure in ['sequences', 'total_length']:
+                result[measure] = np.zeros(rows, dtype=np.int64)
+            else:
+                result[measure] = np.full(rows, np.nan)
+        return result
+
+    lengths = joined['contig_length']
+    keys = [joined[d] for d in dimensions] or [np.zeros(len(joined), dtype=np.int8)]
+    grouped = lengths.groupby(keys, sort=True)
+
+    result = grouped.agg(['count', 'sum', 'min', 'max'])
+    result.columns = ['sequences', 'total_length', 'min_length', 'max_length']
+    quantiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    result['q25_length'] = quantiles[0.25]
+    result['median_length'] = quantiles[0.5]
+    result['q75_length'] = quantiles[0.75]
+
+    result = result.reset_index(drop=not dimensions)
+    if dimensions:
+        result.columns = dimensions + list(result.columns[len(dimensions):])
+    return result[dimensions + MEASURES]
+
+def build_cube(joined):
+    """
+    Pre-aggregate every combination of CUBE_DIMENSIONS.
+
+    Args:
+        joined (pandas.DataFrame): Table from join_dimensions
+
+    Returns:
+        pandas.DataFrame: Aggregates for all groupings, with a 'grouping' column
+            naming the grouped dimensions ('+'-separated, empty for the total)
+    """
+    parts = []
+    for size in range(len(CUBE_DIMENSIONS) + 1):
+        for dimensions in combinations(CUBE_DIMENSIONS, size):
+            part = aggregate(joined, dimensions)
+            part.insert(0, 'grouping', '+'.join(dimensions))
+            parts.append(part)
+    return pd.concat(parts, ignore_index=True)[['grouping'] + CUBE_DIMENSIONS + MEASURES]
+
+def _load_joined(input_dir):
+    """Load the metadata of representative sequences joined on contig code."""
+    representative_ids, _ = load_sequence_mapping(input_dir)
+    return join_dimensions(load_metadata(input_dir, representative_ids))
+
+def load_cube(input_dir, rebuild=False):
+    """
+    Load the summary cube, building and caching it when missing or stale.
+
+    The cube is rebuilt whenever the size or mtime of any metadata file
+    differs from the ones it was built from.
+
+    Args:
+        input_dir (str or Path): Path to input directory containing metadata files
+        rebuild (bool): Force rebuilding the cube
+
+    Returns:
+        pandas.DataFrame: Summary cube from build_cube
+    """
+    cube_path = Path(input_dir) / CUBE_NAME
+    fingerprint = input_fingerprint(input_dir, METADATA_FILES)
+    if not rebuild and cache_is_current(cube_path, fingerprint):
+        return pd.read_csv(cube_path, keep_default_na=False, na_values=[''],
+                           dtype={d: str for d in CUBE_DIMENSIONS + ['grouping']})
+
+    cube = build_cube(_load_joined(input_dir))
+    temp_path = temp_output_path(cube_path)
+    try:
+        cube.to_csv(temp_path, index=False)
+        commit_cache(temp_path, cube_path, fingerprint)
+    except OSError:
+        pass  # Non-critical, the cube is rebuilt next time
+    return cube
+
+def summarize(input_dir, dimensions, rebuild=False):
+    """
+    Summarize the catalogue by the given dimensions.
+
+    Groupings covered by the cube are answered from it, other groupings are
+    aggregated on the fly from the metadata.
+
+    Args:
+        input_dir (str or Path): Path to input directory containing metadata files
+        dimensions (list): Dimensions to group by, keys of DIMENSIONS
+        rebuild (bool): Force rebuilding the cube
+
+    Returns:
+        tuple: (pandas.DataFrame of aggregates, True if answered from the cube)
+    """
+    dimensions = _ordered(dimensions)
+    try:
+        if set(dimensions) <= set(CUBE_DIMENSIONS):
+            cube = load_cube(input_dir, rebuild)
+            grouping = '+'.join(d for d in CUBE_DIMENSIONS if d in dimensions)
+            result = cube[cube['grouping'].fillna('') == grouping]
+            return result[dimensions + MEASURES].reset_index(drop=True), True
+        return aggregate(_load_joined(input_dir), dimensions), False
+    except Exception as e:
+        raise RuntimeError(f"Error summarizing metadata: {str(e)}")
@@ -4,6 +4,7 @@ import requests
 import hashlib
 import shutil
 import tarfile
+import time
 import urllib3
 from pathlib import Path
 from tqdm import tqdm
@@ -98,66 +99,161 @@ def extract_archive(archive_path, output_dir, extract_path=None):
     except Exception as e:
         raise RuntimeError(f"Error extracting archive: {str(e)}")
     
-def download_file(filename, file_info, output_path, chunk_size=1024*1024):
-    """
-    Download a file from Zenodo with progress bar, resume capability, and checksum verification
+# Read sizes are adapted so each read takes about TARGET_READ_SECONDS
+MIN_CHUNK_SIZE = 64*1024
+MAX_CHUNK_SIZE = 16*1024*1024
+TARGET_READ_SECONDS = 0.5
+
+class TransientDownloadError(Exception):
+    """Download failure that is worth retrying (server error, truncated transfer)."""
+
+RETRYABLE_ERRORS = (urllib3.exceptions.HTTPError, ConnectionError, TimeoutError, TransientDownloadError)
+
+def next_chunk_size(chunk_size, elapsed, read_size):
     """
-    output_path = Path(output_path)
-    temp_path = output_path.with_suffix(output_path.suffix + '.tmp')
-    download_url = file_info['download_url']
-    total_size = file_info['size']
-    expected_checksum = file_info['checksum']
+    Adapt the read size to the observed transfer speed.
     
-    # Check disk space
-    try:
-        total, used, free = shutil.disk_usage(output_path.parent)
-        if free < total_size:
-            raise RuntimeError(
-                f"Not enough disk space. Required: {total_size/1e9:.1f}GB, Available: {free/1e9:.1f}GB"
-            )
-    except Exception as e:
-        raise RuntimeError(f"Error checking disk space: {str(e)}")
+    Args:
+        chunk_size (int): Current read size in bytes
+        elapsed (float): Seconds taken by the last read
+        read_size (int): Number of bytes returned by the last read
+        
+    Returns:
+        int: Read size for the next read
+    """
+    if read_size < chunk_size:
+        return chunk_size  # Short read, nothing learnt about the link speed
+    if elapsed < TARGET_READ_SECONDS / 4:
+        chunk_size *= 2
+    elif elapsed > TARGET_READ_SECONDS * 2:
+        chunk_size //= 2
+    return min(max(chunk_size, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
 
-    # Resume download if temp file exists
-    initial_pos = 0
-    if temp_path.exists():
-        initial_pos = temp_path.stat().st_size
-        if initial_pos >= total_size:
-            if verify_checksum(temp_path, expected_checksum):
-                temp_path.rename(output_path)
-                return True
-            else:
-                temp_path.unlink()
-                initial_pos = 0
+def _throttle(start_time, transferred, limit_rate):
+    """Sleep as needed to keep the average transfer rate below limit_rate bytes/s."""
+    if limit_rate:
+        delay = transferred / limit_rate - (time.monotonic() - start_time)
+        if delay > 0:
+            time.sleep(delay)
 
+def _transfer(http, filename, file_info, temp_path, chunk_size, timeout, limit_rate):
+    """
+    Append the missing part of a file to its temporary download file.
+    
+    Returns:
+        int: Adapted read size, to carry over to the next attempt
+    """
+    initial_pos = temp_path.stat().st_size if temp_path.exists() else 0
+    if initial_pos >= file_info['size']:
+        return chunk_size
+    headers = {'Range': f'bytes={initial_pos}-'} if initial_pos > 0 else {}
+    
+    response = http.request(
+        'GET',
+        file_info['download_url'],
+        preload_content=False,
+        headers=headers,
+        timeout=timeout,
+        retries=False
+    )
     try:
-        http = urllib3.PoolManager()
-        headers = {'Range': f'bytes={initial_pos}-'} if initial_pos > 0 else {}
-        
-        response = http.request(
-            'GET',
-            download_url,
-            preload_content=False,
-            headers=headers
-        )
+        if response.status == 429 or response.status >= 500:
+            raise TransientDownloadError(f"server returned HTTP {response.status}")
+        if response.status not in (200, 206):
+            raise RuntimeError(f"server returned HTTP {response.status}")
+        if response.status == 200 and initial_pos > 0:
+            initial_pos = 0  # Range not honoured, start over
         
         mode = 'ab' if initial_pos > 0 else 'wb'
         with open(temp_path, mode) as f, tqdm(
             desc=filename,
             initial=initial_pos,
-            total=total_size,
+            total=file_info['size'],
             unit='iB',
             unit_scale=True,
             unit_divisor=1024,
         ) as pbar:
+            start_time = time.monotonic()
+            transferred = 0
             while True:
-                data = response.read(chunk_size)
+                read_start = time.monotonic()
+                # read1 returns what has arrived, so a dropped connection
+                # loses nothing already received
+                data = response.read1(chunk_size)
                 if not data:
                     break
                 size = f.write(data)
                 pbar.update(size)
-        
+                transferred += size
+                chunk_size = next_chunk_size(chunk_size, time.monotonic() - read_start, size)
+                _throttle(start_time, transferred, limit_rate)
+    finally:
         response.release_conn()
+    
+    if temp_path.stat().st_size < file_info['size']:
+        raise TransientDownloadError("connection closed before the transfer completed")
+    return chunk_size
+
+def download_file(filename, file_info, output_path, chunk_size=1024*1024,
+                  timeout=(30, 120), retries=5, backoff=2.0, limit_rate=None):
+    """
+    Download a file from Zenodo with progress bar, resume capability, and checksum verification.
+    
+    Transient failures (timeouts, dropped connections, server errors) are
+    retried with exponential backoff, resuming from the partial file each
+    time. The partial file is kept when all retries fail, so running the
+    download again resumes it.
+    
+    Args:
+        filename (str): Name of the file, used for the progress bar
+        file_info (dict): File size, checksum and download URL from get_file_info
+        output_path (str or Path): Destination path
+        chunk_size (int): Initial read size in bytes, adapted during the transfer
+        timeout (tuple): (connect, read) timeouts in seconds
+        retries (int): Number of retries after the first attempt
+        backoff (float): Delay before the first retry, doubled on each retry
+        limit_rate (int, optional): Maximum transfer rate in bytes per second
+        
+    Returns:
+        bool: True if the file was downloaded and verified
+    """
+    output_path = Path(output_path)
+    temp_path = output_path.with_suffix(output_path.suffix + '.tmp')
+    total_size = file_info['size']
+    expected_checksum = file_info['checksum']
+    
+    # Check disk space for the part still to download
+    initial_pos = temp_path.stat().st_size if temp_path.exists() else 0
+    try:
+        total, used, free = shutil.disk_usage(output_path.parent)
+        if free < total_size - initial_pos:
+            raise RuntimeError(
+                f"Not enough disk space. Required: {(total_size - initial_pos)/1e9:.1f}GB, Available: {free/1e9:.1f}GB"
+            )
+    except Exception as e:
+        raise RuntimeError(f"Error checking disk space: {str(e)}")
+
+    # Discard a complete but corrupt temp file before resuming
+    if initial_pos >= total_size and not verify_checksum(temp_path, expected_checksum):
+        temp_path.unlink()
+
+    try:
+        http = urllib3.PoolManager()
+        timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        for attempt in range(retries + 1):
+            try:
+                chunk_size = _transfer(http, filename, file_info, temp_path,
+                                       chunk_size, timeout, limit_rate)
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt == retries:
+                    raise RuntimeError(
+                        f"{str(e)} (giving up after {retries + 1} attempts, "
+                        f"partial download kept in {temp_path}, run the command again to resume)"
+                    )
+                delay = backoff * 2 ** attempt
+                tqdm.write(f"Download of {filename} interrupted ({str(e)}), retrying in {delay:.0f}s...")
+                time.sleep(delay)
         
         if verify_checksum(temp_path, expected_checksum):
             temp_path.rename(output_path)
@@ -167,17 +263,16 @@ def download_file(filename, file_info, output_path, chunk_size=1024*1024):
             raise RuntimeError(f"Checksum verification failed for {filename}")
             
     except Exception as e:
-        if temp_path.exists():
-            temp_path.unlink()
         raise RuntimeError(f"Error downloading {filename}: {str(e)}")
     
-def download_subset(subset_name, output_dir="."):
+def download_subset(subset_name, output_dir=".", limit_rate=None):
     """
     Download a specific subset and its associated files
     
     Args:
         subset_name (str): Name of the subset to download
         output_dir (str or Path): Directory to save downloaded files
+        limit_rate (int, optional): Maximum transfer rate in bytes per second
         
     Returns:
         bool: True if download was successful
@@ -201,7 +296,7 @@ def download_subset(subset_name, output_dir="."):
         output_path = output_dir / filename
         
         # Download file
-        if not download_file(filename, file_info[filename], output_path):
+        if not download_file(filename, file_info[filename], output_path, limit_rate=limit_rate):
             raise RuntimeError(f"Failed to download {filename}")
             
         # Extract if needed
@@ -1,7 +1,10 @@
 # tests/commands/test_filter.py
 """Test filter command."""
 
+import io
+import json
 import pytest
+import pandas as pd
 from click.testing import CliRunner
 from avrc.commands.filter import filter_cmd
 
@@ -41,3 +44,285 @@ def test_filter_command_invalid_input(test_data_dir):
     
     assert result.exit_code != 0
     assert "Error" in result.output
+
+def test_filter_command_manifest(test_data_dir, tmp_path):
+    """Test manifest is written and unchanged outputs are kept."""
+    output_dir = tmp_path / "out"
+    runner = CliRunner()
+    args = [
+        str(test_data_dir),
+        '--quality', 'Complete',
+        '--output', 'metadata',
+        '--output-dir', str(output_dir)
+    ]
+    result = runner.invoke(filter_cmd, args)
+    assert result.exit_code == 0
+    
+    manifest = json.loads((output_dir / 'filter_manifest.json').read_text())
+    assert manifest['parameters']['quality'] == 'Complete'
+    assert manifest['outputs']['filtered_quality.csv']['records'] == 1
+    assert 'AvRCv1.Merged_Quality.csv' in manifest['input']['files']
+    
+    mtime = (output_dir / 'filtered_quality.csv').stat().st_mtime_ns
+    result = runner.invoke(filter_cmd, args)
+    assert result.exit_code == 0
+    assert "unchanged" in result.output
+    assert (output_dir / 'filtered_quality.csv').stat().st_mtime_ns == mtime
+    assert not list(output_dir.glob('.tmp-*'))
+
+def test_filter_command_failure_cleanup(test_data_dir, tmp_path, mocker):
+    """Test a failed run leaves no temporary files and no stale manifest."""
+    output_dir = tmp_path / "out"
+    args = [
+        str(test_data_dir),
+        '--quality', 'Complete',
+        '--output', 'metadata',
+        '--output-dir', str(output_dir)
+    ]
+    runner = CliRunner()
+    assert runner.invoke(filter_cmd, args).exit_code == 0
+    assert (output_dir / 'filter_manifest.json').exists()
+    
+    def failing_to_csv(self, path, **kwargs):
+        with open(path, 'w') as f:
+            f.write("partial")
+        raise OSError("No space left on device")
+    mocker.patch('pandas.DataFrame.to_csv', failing_to_csv)
+    
+    result = runner.invoke(filter_cmd, args)
+    assert result.exit_code != 0
+    assert "No space left on device" in result.output
+    assert not list(output_dir.glob('.tmp-*'))
+    assert not (output_dir / 'filter_manifest.json').exists()
+
+def test_filter_command_content_filters(test_data_dir, tmp_path, mocker):
+    """Test content filters narrow both the sequences and the metadata."""
+    mocker.patch('shutil.which', return_value='/usr/bin/seqkit')
+    mocker.patch('subprocess.run')
+    proc = mocker.Mock()
+    proc.stdout = io.BytesIO(b">seq1\nATGC\n>seq4\nTACG\n>seq2\nATGC\n")
+    proc.wait.return_value = 0
+    mocker.patch('subprocess.Popen', return_value=proc)
+    
+    output_dir = tmp_path / "out"
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir),
+        '--dedup',
+        '--output', 'both',
+        '--output-dir', str(output_dir)
+    ])
+    
+    assert result.exit_code == 0
+    assert "Wrote 2 records to" in result.output
+    quality = pd.read_csv(output_dir / 'filtered_quality.csv')
+    assert quality['contig_id'].tolist() == ['seq1', 'seq4']
+    manifest = json.loads((output_dir / 'filter_manifest.json').read_text())
+    assert manifest['parameters']['dedup'] is True
+
+def test_filter_command_content_filters_need_fasta(test_data_dir):
+    """Test content filters are rejected for metadata-only output."""
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir),
+        '--min-gc', '0.4',
+        '--output', 'metadata'
+    ])
+    
+    assert result.exit_code != 0
+    assert "require --output fasta or both" in result.output
+
+def test_filter_command_parquet(test_data_dir, tmp_path):
+    """Test joined Parquet metadata output."""
+    pytest.importorskip("pyarrow")
+    output_dir = tmp_path / "out"
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir),
+        '--host-domain', 'Bacteria',
+        '--output', 'metadata',
+        '--metadata-format', 'parquet',
+        '--output-dir', str(output_dir)
+    ])
+    
+    assert result.exit_code == 0
+    assert pd.read_parquet(output_dir / 'filtered_metadata.parquet')['contig_id'].tolist() == [
+        'seq1', 'seq2', 'seq4'
+    ]
+    assert not (output_dir / 'filtered_quality.csv').exists()
+
+def test_filter_command_columnar_needs_pyarrow(test_data_dir, mocker):
+    """Test a clear error is raised when pyarrow is missing."""
+    mocker.patch('avrc.commands.filter.columnar_available',
+                 return_value=(False, "Parquet and Arrow output require pyarrow"))
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir),
+        '--output', 'metadata',
+        '--metadata-format', 'arrow'
+    ])
+    
+    assert result.exit_code != 0
+    assert "require pyarrow" in result.output
+
+def test_filter_command_sample(test_data_dir, tmp_path):
+    """Test seeded sampling is reproducible and recorded in the manifest."""
+    output_dir = tmp_path / "out"
+    runner = CliRunner()
+    args = [
+        str(test_data_dir),
+        '--sample', '1',
+        '--stratify-by', 'Host_Domain',
+        '--seed', '7',
+        '--output', 'metadata',
+        '--output-dir', str(output_dir)
+    ]
+    result = runner.invoke(filter_cmd, args)
+    
+    assert result.exit_code == 0
+    assert "Sampled 2 sequences (seed 7)" in result.output
+    first = (output_dir / 'filtered_quality.csv').read_text()
+    manifest = json.loads((output_dir / 'filter_manifest.json').read_text())
+    assert manifest['parameters']['seed'] == 7
+    
+    result = runner.invoke(filter_cmd, args)
+    assert (output_dir / 'filtered_quality.csv').read_text() == first
+
+def test_filter_command_sample_options(test_data_dir):
+    """Test invalid sampling option combinations."""
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir), '--sample', '1', '--sample-fraction', '0.5', '--output', 'metadata'
+    ])
+    assert result.exit_code != 0
+    assert "mutually exclusive" in result.output
+    
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir), '--seed', '1', '--output', 'metadata'
+    ])
+    assert result.exit_code != 0
+    assert "require --sample" in result.output
+
+def test_filter_command_ids_files(test_data_dir, tmp_path):
+    """Test include and exclude ID files, with vOTU mapping."""
+    ids_file = tmp_path / "ids.txt"
+    ids_file.write_text("vOTU1\nvOTU2\nseq4\n")
+    exclude_file = tmp_path / "exclude.csv"
+    exclude_file.write_text("contig_id\nseq2\n")
+    output_dir = tmp_path / "out"
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir),
+        '--ids-file', str(ids_file),
+        '--exclude-ids-file', str(exclude_file),
+        '--map-votu',
+        '--output', 'metadata',
+        '--output-dir', str(output_dir)
+    ])
+    
+    assert result.exit_code == 0
+    assert "Read 3 IDs" in result.output
+    assert "Found 2 sequences matching criteria" in result.output
+    manifest = json.loads((output_dir / 'filter_manifest.json').read_text())
+    assert manifest['parameters']['include_ids_file'] == str(ids_file)
+    assert len(manifest['parameters']['exclude_ids_sha256']) == 64
+
+def test_filter_command_ids_files_no_match(test_data_dir, tmp_path):
+    """Test ID lists matching nothing fail (include) or warn (exclude)."""
+    ids_file = tmp_path / "ids.txt"
+    ids_file.write_text("vOTU1\nvOTU2\n")
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir),
+        '--ids-file', str(ids_file),
+        '--output', 'metadata',
+        '--output-dir', str(tmp_path / "out")
+    ])
+    assert result.exit_code != 0
+    assert "None of the 2 IDs" in result.output
+    
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir),
+        '--exclude-ids-file', str(ids_file),
+        '--output', 'metadata',
+        '--output-dir', str(tmp_path / "out")
+    ])
+    assert result.exit_code == 0
+    assert "Warning: None of the 2 IDs" in result.output
+    assert "Found 4 sequences matching criteria" in result.output
+
+def test_filter_command_dry_run(test_data_dir, tmp_path):
+    """Test dry runs report the plan without seqkit or writing outputs."""
+    output_dir = tmp_path / "out"
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir),
+        '--quality', 'Complete',
+        '--host-domain', 'Bacteria',
+        '--dry-run',
+        '--output', 'both',
+        '--output-dir', str(output_dir)
+    ])
+    
+    assert result.exit_code == 0
+    assert "Query plan:" in result.output
+    assert "host_domain" in result.output
+    assert "75.0%" in result.output
+    assert "Estimated output: 1 sequences" in result.output
+    assert "Estimated extraction time" in result.output
+    assert not output_dir.exists()
+
+def test_filter_command_explain(test_data_dir, tmp_path):
+    """Test --explain reports the plan and still writes outputs."""
+    output_dir = tmp_path / "out"
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, [
+        str(test_data_dir),
+        '--min-length', '2000',
+        '--explain',
+        '--output', 'metadata',
+        '--output-dir', str(output_dir)
+    ])
+    
+    assert result.exit_code == 0
+    assert "Query plan:" in result.output
+    assert "Estimated extraction time" not in result.output
+    assert (output_dir / 'filtered_quality.csv').exists()
+
+def test_filter_command_shards(test_data_dir, tmp_path, mocker):
+    """Test shards are only used with --shards and recorded in the manifest."""
+    mocker.patch('avrc.commands.filter.verify_seqkit', return_value=(True, "ok"))
+    mocker.patch('avrc.commands.filter.count_sequences', return_value=1)
+    def write(*args):
+        args[1].write_bytes(b"")
+    mock_filter = mocker.patch('avrc.commands.filter.filter_sequences', side_effect=write)
+    mock_shards = mocker.patch('avrc.commands.filter.filter_sequence_shards', side_effect=write)
+    
+    # Leftover shards next to the catalogue are ignored
+    (test_data_dir / 'AVrC_allrepresentatives.part_001.fasta.gz').touch()
+    shard_dir = tmp_path / "shards"
+    shard_dir.mkdir()
+    for i in [1, 2]:
+        (shard_dir / f'AVrC_allrepresentatives.part_00{i}.fasta.gz').touch()
+    
+    output_dir = tmp_path / "out"
+    args = [str(test_data_dir), '--output', 'fasta', '--output-dir', str(output_dir),
+            '--threads', '2']
+    runner = CliRunner()
+    result = runner.invoke(filter_cmd, args)
+    assert result.exit_code == 0
+    assert mock_filter.call_args[0][0] == test_data_dir / 'AVrC_allrepresentatives.fasta.gz'
+    assert not mock_shards.called
+    
+    result = runner.invoke(filter_cmd, args + ['--shards', str(shard_dir)])
+    assert result.exit_code == 0
+    assert [s.name for s in mock_shards.call_args[0][0]] == [
+        'AVrC_allrepresentatives.part_001.fasta.gz',
+        'AVrC_allrepresentatives.part_002.fasta.gz'
+    ]
+    manifest = json.loads((output_dir / 'filter_manifest.json').read_text())
+    assert str(shard_dir / 'AVrC_allrepresentatives.part_002.fasta.gz') in manifest['input']['files']
+    
+    result = runner.invoke(filter_cmd, args + ['--shards', str(output_dir)])
+    assert result.exit_code != 0
+    assert "No AVrC_allrepresentatives.fasta.gz shards found" in result.output
@@ -0,0 +1,43 @@
+# tests/commands/test_summarize.py
+"""Test summarize command."""
+
+import pytest
+from click.testing import CliRunner
+from avrc.commands.summarize import summarize_cmd
+
+def test_summarize_command(test_data_dir):
+    """Test summary printed to the terminal."""
+    runner = CliRunner()
+    result = runner.invoke(summarize_cmd, [
+        str(test_data_dir),
+        '--by', 'quality',
+        '--by', 'lifestyle'
+    ])
+    
+    assert result.exit_code == 0
+    assert "Complete" in result.output
+    assert "median_length" in result.output
+
+def test_summarize_command_output_file(test_data_dir, tmp_path):
+    """Test summary written to a CSV file."""
+    output_file = tmp_path / "summary.csv"
+    runner = CliRunner()
+    result = runner.invoke(summarize_cmd, [
+        str(test_data_dir),
+        '--by', 'host-genus',
+        '--output-file', str(output_file)
+    ])
+    
+    assert result.exit_code == 0
+    assert "Wrote 4 groups" in result.output
+    assert output_file.read_text().startswith("host_genus,sequences")
+
+def test_summarize_command_empty(test_data_dir):
+    """Test grouping a catalogue without representatives."""
+    quality_file = test_data_dir / 'AvRCv1.Merged_Quality.csv'
+    quality_file.write_text(quality_file.read_text().splitlines()[0] + "\n")
+    runner = CliRunner()
+    result = runner.invoke(summarize_cmd, [str(test_data_dir), '--by', 'quality'])
+    
+    assert result.exit_code == 0
+    assert "No sequences to summarize" in result.output
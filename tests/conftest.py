@@ -69,6 +69,11 @@ def test_data_dir(tmp_path):
 def mock_seqkit(mocker):
     """Mock seqkit command execution."""
     def mock_run(*args, **kwargs):
+        cmd = args[0] if args else kwargs.get('args', [])
+        if '-o' in cmd:
+            # Create the output file like seqkit would
+            with gzip.open(cmd[cmd.index('-o') + 1], 'wt') as f:
+                f.write(">seq1\nATGC\n")
         class MockResult:
             stdout = "file\tformat\ttype\tnum_seqs\tsum_len\tmin_len\tmax_len\tavg_len\n" \
                     "test.fa\tFASTA\tDNA\t4\t16\t4\t4\t4"
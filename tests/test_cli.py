@@ -17,3 +17,16 @@ def test_cli_help():
     result = runner.invoke(main, ['--help'])
     assert result.exit_code == 0
     assert "Usage:" in result.output
+
+def test_download_limit_rate_parsing():
+    """Test --limit-rate parsing."""
+    from avrc.commands.download import parse_rate
+    
+    assert parse_rate(None, None, '500K') == 500 * 1024
+    assert parse_rate(None, None, '1.5m') == int(1.5 * 1024**2)
+    assert parse_rate(None, None, '2048') == 2048
+    
+    runner = CliRunner()
+    result = runner.invoke(main, ['download', 'hq', '--limit-rate', 'fast'])
+    assert result.exit_code != 0
+    assert "invalid rate" in result.output
@@ -0,0 +1,52 @@
+# tests/utils/test_columnar.py
+"""Test joined columnar metadata output."""
+
+import pytest
+from avrc.utils.metadata import load_sequence_mapping, load_metadata, apply_filters_mask, select_rows
+from avrc.utils.columnar import iter_joined_batches, write_joined_metadata
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+@pytest.fixture
+def selection(test_data_dir):
+    """Metadata and the rows selected for temperate sequences."""
+    rep_ids, _ = load_sequence_mapping(test_data_dir)
+    metadata = load_metadata(test_data_dir, rep_ids)
+    mask = apply_filters_mask(metadata, lifestyle='temperate')
+    return metadata, {name: select_rows(df, mask) for name, df in metadata.items()}
+
+def test_iter_joined_batches(selection):
+    """Test batches hold one joined row per selected sequence."""
+    metadata, selected = selection
+    batches = list(iter_joined_batches(metadata, selected, batch_rows=1))
+    
+    assert len(batches) == 2
+    joined = batches[0]
+    assert list(joined.columns) == [
+        'contig_id', 'vOTU_ID', 'checkv_quality', 'contig_length', 'Plasmid',
+        'pred_lifestyle', 'Realm', 'Phylum', 'Class',
+        'Host_Domain', 'Host_Phylum', 'Host_Genus'
+    ]
+    assert joined.iloc[0]['Host_Genus'] == 'Bacillus'
+
+def test_write_parquet(selection, tmp_path):
+    """Test Parquet output is typed and written in row groups."""
+    metadata, selected = selection
+    output_file = tmp_path / "metadata.parquet"
+    
+    assert write_joined_metadata(metadata, selected, output_file, 'parquet', batch_rows=1) == 2
+    parquet_file = pq.ParquetFile(output_file)
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.schema_arrow.field('contig_length').type == pa.int64()
+    assert parquet_file.schema_arrow.field('Plasmid').type == pa.bool_()
+    assert parquet_file.read()['contig_id'].to_pylist() == ['seq1', 'seq4']
+
+def test_write_arrow(selection, tmp_path):
+    """Test Arrow IPC file output."""
+    metadata, selected = selection
+    output_file = tmp_path / "metadata.arrow"
+    
+    write_joined_metadata(metadata, selected, output_file, 'arrow')
+    table = pa.ipc.open_file(output_file).read_all()
+    assert table['Host_Phylum'].to_pylist() == ['Firmicutes', 'Proteobacteria']
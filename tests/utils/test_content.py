@@ -0,0 +1,123 @@
+# tests/utils/test_content.py
+"""Test sequence content filters."""
+
+import gzip
+import io
+import pytest
+from avrc.utils.content import (make_content_filter, sequence_digest, filter_fasta_stream,
+                                filter_sequences_by_content)
+
+FASTA = (
+    b">seq1 desc\nGGCC\nGGCC\n"
+    b">seq2\nATATATAT\n"
+    b">seq3\nACGTNNNN\n"
+    b">seq4\nggccggcc\n"
+)
+
+def test_no_content_filter():
+    """Test no predicate is built without content criteria."""
+    assert make_content_filter() is None
+
+def test_gc_filter():
+    """Test GC fraction bounds."""
+    keep = make_content_filter(min_gc=0.4, max_gc=0.6)
+    
+    assert keep(b"ACGT") is True
+    assert keep(b"GGCC") is False
+    assert keep(b"ATAT") is False
+    assert keep(b"ACGTNNNN") is True  # N bases do not count towards GC
+
+def test_n_fraction_filter():
+    """Test maximum fraction of N bases."""
+    keep = make_content_filter(max_n_fraction=0.25)
+    
+    assert keep(b"ACGN") is True
+    assert keep(b"ACNN") is False
+
+def test_motif_filter_both_strands():
+    """Test motifs are found on either strand."""
+    keep = make_content_filter(motif='aacg')
+    
+    assert keep(b"TTAACGTT") is True
+    assert keep(b"TTCGTTTT") is True  # reverse complement of AACG
+    assert keep(b"TTTTTTTT") is False
+
+def test_sequence_digest():
+    """Test digests identify identical sequences."""
+    assert sequence_digest(b"ACGT") == sequence_digest(b"ACGT")
+    assert sequence_digest(b"ACGT") != sequence_digest(b"ACGA")
+
+def test_filter_fasta_stream():
+    """Test multi-line records are joined, filtered and rewrapped."""
+    output = io.BytesIO()
+    records = filter_fasta_stream(io.BytesIO(FASTA), output, make_content_filter(max_gc=0.9),
+                                  dedup=True, line_width=6)
+    
+    assert [seq_id for seq_id, _ in records] == ['seq2', 'seq3']
+    assert records[0][1] == sequence_digest(b"ATATATAT")
+    assert output.getvalue() == b">seq2\nATATAT\nAT\n>seq3\nACGTNN\nNN\n"
+
+def test_filter_fasta_stream_keeps_case():
+    """Test soft-masked bases are filtered case-insensitively but written unchanged."""
+    output = io.BytesIO()
+    fasta = b">seq1\nacgtGG\nCCnn\n>seq2\natat\n"
+    records = filter_fasta_stream(io.BytesIO(fasta), output,
+                                  make_content_filter(min_gc=0.5, motif='GGCC'), line_width=0)
+    
+    assert records == [('seq1', None)]
+    assert output.getvalue() == b">seq1\nacgtGGCCnn\n"
+
+def _fake_popen(mocker, outputs):
+    """Mock seqkit processes printing the given FASTA per input file."""
+    def fake_popen(cmd, stdout):
+        proc = mocker.Mock()
+        proc.stdout = io.BytesIO(outputs[cmd[6]])
+        proc.wait.return_value = 0
+        return proc
+    return mocker.patch('subprocess.Popen', side_effect=fake_popen)
+
+def test_filter_sequences_by_content(mocker, tmp_path):
+    """Test seqkit output is streamed through the content filter."""
+    mock_popen = _fake_popen(mocker, {"a.fasta.gz": FASTA})
+    
+    output_file = tmp_path / "out.fasta.gz"
+    kept_ids = filter_sequences_by_content(
+        ["a.fasta.gz"], output_file, "ids.txt", make_content_filter(min_gc=0.9), threads=2
+    )
+    
+    assert kept_ids == ['seq1', 'seq4']
+    assert mock_popen.call_args[0][0] == [
+        'seqkit', 'grep', '-w', '0', '-f', 'ids.txt', 'a.fasta.gz', '-j', '2'
+    ]
+    with gzip.open(output_file, 'rb') as f:
+        assert f.read() == b">seq1 desc\nGGCCGGCC\n>seq4\nggccggcc\n"
+    assert list(tmp_path.iterdir()) == [output_file]
+
+def test_filter_sequences_by_content_shards_dedup(mocker, tmp_path):
+    """Test shards are filtered by parallel workers and duplicates dropped in shard order."""
+    _fake_popen(mocker, {
+        "a.fasta.gz": b">s1\nACGT\n>s2\nGGGG\n>s3\nacgt\n",
+        "b.fasta.gz": b">s4\nGGGG\n>s5\nTTTT\n"
+    })
+    
+    output_file = tmp_path / "out.fasta.gz"
+    kept_ids = filter_sequences_by_content(
+        ["a.fasta.gz", "b.fasta.gz"], output_file, "ids.txt", dedup=True, processes=2
+    )
+    
+    assert kept_ids == ['s1', 's2', 's5']
+    with gzip.open(output_file, 'rb') as f:
+        assert f.read() == b">s1\nACGT\n>s2\nGGGG\n>s5\nTTTT\n"
+    assert list(tmp_path.iterdir()) == [output_file]
+
+def test_filter_sequences_by_content_error(mocker, tmp_path):
+    """Test seqkit failures are reported."""
+    proc = mocker.Mock()
+    proc.stdout = io.BytesIO(b"")
+    proc.wait.return_value = 1
+    mocker.patch('subprocess.Popen', return_value=proc)
+    
+    with pytest.raises(RuntimeError, match="Error filtering sequences"):
+        filter_sequences_by_content(["a.fasta.gz"], tmp_path / "out.fasta.gz", "ids.txt",
+                                    dedup=True)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,144 @@
+# tests/utils/test_iddict.py
+"""Test contig ID dictionary."""
+
+import gzip
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from avrc.utils.iddict import ContigIdDict, VotuMap, load_id_dict, read_id_list, ID_TABLE_NAME
+from avrc.utils.metadata import load_sequence_mapping
+
+def test_encode_decode():
+    """Test IDs map to dense sorted codes and back."""
+    id_dict = ContigIdDict.from_ids(['seq3', 'seq1', 'seq2', 'seq1'])
+    
+    assert len(id_dict) == 3
+    codes = id_dict.encode(['seq2', 'seq1', 'missing', 'seq3_long_suffix', None])
+    assert codes.dtype == np.int32
+    assert codes.tolist() == [1, 0, -1, -1, -1]
+    assert id_dict.decode([2, 0]) == ['seq3', 'seq1']
+    assert 'seq3' in id_dict
+    assert 'seq' not in id_dict
+    assert list(id_dict) == ['seq1', 'seq2', 'seq3']
+
+def test_bitmap():
+    """Test bitmaps ignore unknown codes."""
+    id_dict = ContigIdDict.from_ids(['a', 'b', 'c'])
+    
+    bitmap = id_dict.bitmap(id_dict.encode(['c', 'x']))
+    assert bitmap.tolist() == [False, False, True]
+
+def test_save_load_mmap(tmp_path):
+    """Test saved dictionaries are memory-mapped on load."""
+    path = tmp_path / 'ids.npy'
+    ContigIdDict.from_ids(['a', 'b']).save(path)
+    
+    id_dict = ContigIdDict.load(path)
+    assert isinstance(id_dict.table, np.memmap)
+    assert id_dict.encode(['b']).tolist() == [1]
+
+def test_load_id_dict_cache(test_data_dir):
+    """Test the cached dictionary is reused until the sequence table changes."""
+    calls = []
+    def loader():
+        calls.append(1)
+        return ['seq1', 'seq2']
+    
+    load_id_dict(test_data_dir, loader)
+    assert (test_data_dir / ID_TABLE_NAME).exists()
+    assert len(load_id_dict(test_data_dir, loader)) == 2
+    assert len(calls) == 1
+    
+    seq_table = test_data_dir / 'AvRCv1.SequenceTable.csv'
+    cache_mtime = (test_data_dir / ID_TABLE_NAME).stat().st_mtime_ns
+    os.utime(seq_table, ns=(cache_mtime + 10**9, cache_mtime + 10**9))
+    load_id_dict(test_data_dir, loader)
+    assert len(calls) == 2
+
+def test_load_id_dict_cache_older_source(test_data_dir):
+    """Test a replaced sequence table older than the cache still invalidates it."""
+    assert list(load_sequence_mapping(test_data_dir)[0]) == ['seq1', 'seq2', 'seq3', 'seq4']
+    
+    # Replaced table keeping an older mtime, as extracted from an archive
+    seq_table = test_data_dir / 'AvRCv1.SequenceTable.csv'
+    seq_table.write_text(seq_table.read_text() + "seq0,vOTU0,seq0\n")
+    old_mtime = (test_data_dir / ID_TABLE_NAME).stat().st_mtime_ns - 10**12
+    os.utime(seq_table, ns=(old_mtime, old_mtime))
+    
+    representative_ids, votu_map = load_sequence_mapping(test_data_dir)
+    assert list(representative_ids) == ['seq0', 'seq1', 'seq2', 'seq3', 'seq4']
+    assert votu_map.encode(['vOTU0']).tolist() == [0]
+
+def test_load_sequence_mapping_warm_cache(test_data_dir, mocker):
+    """Test a current cache skips the sequence table until vOTUs are mapped."""
+    load_sequence_mapping(test_data_dir)
+    read_csv = mocker.spy(pd, 'read_csv')
+    
+    representative_ids, votu_map = load_sequence_mapping(test_data_dir)
+    assert len(representative_ids) == 4
+    assert read_csv.call_count == 0
+    
+    assert votu_map.encode(['vOTU2', 'seq2', 'vOTU4']).tolist() == [1, -1, 3]
+    assert votu_map['vOTU1'] == 'seq1'
+    with pytest.raises(KeyError):
+        votu_map['vOTU9']
+    assert read_csv.call_count == 1
+
+@pytest.mark.parametrize("name,opener", [
+    ("ids.txt", open),
+    ("ids.txt.gz", gzip.open),
+    ("ids.list", gzip.open),
+])
+def test_read_id_list(tmp_path, name, opener):
+    """Test plain and gzip-compressed ID lists, whatever their extension."""
+    path = tmp_path / name
+    with opener(path, 'wt') as f:
+        f.write("seq2\n\nunknown\n seq3 \n")
+    id_dict = ContigIdDict.from_ids(['seq1', 'seq2', 'seq3'])
+    
+    bitmap, total, matched = read_id_list(path, id_dict, chunk_size=3)
+    assert bitmap.tolist() == [False, True, True]
+    assert (total, matched) == (3, 2)
+
+def test_read_id_list_csv_votu(tmp_path):
+    """Test the first CSV column is used and vOTU IDs are mapped."""
+    path = tmp_path / "ids.csv"
+    path.write_text("id,count\nvOTU1,10\nseq3,5\n")
+    id_dict = ContigIdDict.from_ids(['seq1', 'seq2', 'seq3'])
+    
+    votu_map = VotuMap(id_dict, lambda: pd.DataFrame({'vOTU_ID': ['vOTU1'], 'contig_id': ['seq1']}))
+    bitmap, total, matched = read_id_list(path, id_dict, votu_map=votu_map)
+    assert bitmap.tolist() == [True, False, True]
+    assert (total, matched) == (3, 2)
+
+def test_read_id_list_tsv(tmp_path):
+    """Test tab and space separated lists use their first field."""
+    path = tmp_path / "hits.tsv"
+    path.write_text("seq1\t0.98\t120\nseq3 0.5\n")
+    id_dict = ContigIdDict.from_ids(['seq1', 'seq2', 'seq3'])
+    
+    bitmap, total, matched = read_id_list(path, id_dict)
+    assert bitmap.tolist() == [True, False, True]
+    assert (total, matched) == (2, 2)
+
+def test_read_id_list_empty(tmp_path):
+    """Test an empty ID list selects nothing."""
+    path = tmp_path / "ids.txt"
+    path.write_text("")
+    
+    bitmap, total, matched = read_id_list(path, ContigIdDict.from_ids(['seq1']))
+    assert bitmap.tolist() == [False]
+    assert total == 0
+
+def test_read_id_list_large(tmp_path):
+    """Test a large ID list is streamed in chunks."""
+    ids = [f"contig_{i:07d}" for i in range(200_000)]
+    id_dict = ContigIdDict.from_ids(ids[::2])
+    path = tmp_path / "ids.txt.gz"
+    with gzip.open(path, 'wt') as f:
+        f.write("\n".join(ids) + "\n")
+    
+    bitmap, total, matched = read_id_list(path, id_dict, chunk_size=100_000)
+    assert (total, matched) == (200_000, 100_000)
+    assert bitmap.all()
@@ -0,0 +1,79 @@
+# tests/utils/test_manifest.py
+"""Test output manifest utilities."""
+
+import hashlib
+import os
+from avrc.utils.manifest import (file_digest, input_fingerprint, temp_output_path,
+                                 commit_output, cache_is_current, commit_cache,
+                                 cache_fingerprint_path)
+
+def test_file_digest(tmp_path):
+    """Test streaming file digest."""
+    path = tmp_path / "data.txt"
+    path.write_bytes(b"ACGT" * 1000)
+    
+    assert file_digest(path, chunk_size=7) == hashlib.sha256(b"ACGT" * 1000).hexdigest()
+
+def test_input_fingerprint(test_data_dir):
+    """Test input fingerprint changes with the dataset."""
+    names = ['AvRCv1.Merged_Quality.csv', 'missing.csv']
+    first = input_fingerprint(test_data_dir, names)
+    
+    assert list(first['files']) == ['AvRCv1.Merged_Quality.csv']
+    assert first == input_fingerprint(test_data_dir, names)
+    
+    with open(test_data_dir / 'AvRCv1.Merged_Quality.csv', 'a') as f:
+        f.write("seq5,vOTU5,Complete,5000,False\n")
+    assert first['fingerprint'] != input_fingerprint(test_data_dir, names)['fingerprint']
+
+def test_temp_output_path_keeps_extension(tmp_path):
+    """Test temporary path lives next to the output and keeps its extension."""
+    temp_path = temp_output_path(tmp_path / "filtered_sequences.fasta.gz")
+    
+    assert temp_path.parent == tmp_path
+    assert temp_path.name.endswith("filtered_sequences.fasta.gz")
+
+def test_commit_output(tmp_path):
+    """Test outputs are replaced only when their content changes."""
+    output_path = tmp_path / "out.csv"
+    
+    temp_path = temp_output_path(output_path)
+    temp_path.write_text("a,b\n")
+    digest, rewritten = commit_output(temp_path, output_path)
+    assert rewritten is True
+    assert digest == hashlib.sha256(b"a,b\n").hexdigest()
+    assert not temp_path.exists()
+    
+    inode = output_path.stat().st_ino
+    temp_path.write_text("a,b\n")
+    _, rewritten = commit_output(temp_path, output_path)
+    assert rewritten is False
+    assert not temp_path.exists()
+    assert output_path.stat().st_ino == inode
+    
+    temp_path.write_text("a,c\n")
+    _, rewritten = commit_output(temp_path, output_path)
+    assert rewritten is True
+    assert output_path.read_text() == "a,c\n"
+
+def test_commit_cache(tmp_path):
+    """Test caches are reused only for the inputs they were built from."""
+    (tmp_path / "source.csv").write_text("a\n")
+    fingerprint = input_fingerprint(tmp_path, ['source.csv'])
+    cache_path = tmp_path / "cache.npy"
+    assert cache_is_current(cache_path, fingerprint) is False
+    
+    temp_path = temp_output_path(cache_path)
+    temp_path.write_text("cached")
+    commit_cache(temp_path, cache_path, fingerprint)
+    assert cache_path.read_text() == "cached"
+    assert cache_fingerprint_path(cache_path).exists()
+    assert cache_is_current(cache_path, fingerprint) is True
+    
+    # Any change of size or mtime invalidates the cache, even to an older mtime
+    (tmp_path / "source.csv").write_text("b\n")
+    os.utime(tmp_path / "source.csv", ns=(0, 0))
+    assert cache_is_current(cache_path, input_fingerprint(tmp_path, ['source.csv'])) is False
+    
+    cache_fingerprint_path(cache_path).write_text("not json")
+    assert cache_is_current(cache_path, fingerprint) is False
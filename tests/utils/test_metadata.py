@@ -2,7 +2,9 @@
 """Test metadata handling utilities."""
 
 import pytest
-from avrc.utils.metadata import load_sequence_mapping, load_metadata, apply_filters
+from avrc.utils.metadata import (load_sequence_mapping, load_metadata, apply_filters,
+                                 apply_filters_mask, criterion_masks, select_rows,
+                                 sample_mask)
 
 def test_load_sequence_mapping(test_data_dir):
     """Test loading sequence mapping."""
@@ -47,3 +49,73 @@ def test_apply_filters(test_data_dir):
     )
     assert len(filtered_ids) == 1
     assert 'seq4' in filtered_ids
+
+def test_apply_filters_mask(test_data_dir):
+    """Test filters produce bitmaps indexed by contig code."""
+    rep_ids, _ = load_sequence_mapping(test_data_dir)
+    metadata = load_metadata(test_data_dir, rep_ids)
+    
+    mask = apply_filters_mask(metadata, lifestyle='temperate')
+    assert rep_ids.decode(mask.nonzero()[0]) == ['seq1', 'seq4']
+    assert select_rows(metadata['hosts'], mask)['Host_Genus'].tolist() == ['Bacillus', 'Escherichia']
+
+def test_criterion_masks(test_data_dir):
+    """Test one bitmap is built per active criterion."""
+    rep_ids, _ = load_sequence_mapping(test_data_dir)
+    metadata = load_metadata(test_data_dir, rep_ids)
+    
+    masks = criterion_masks(metadata, quality='Complete', min_length=None, no_plasmids=True)
+    assert [name for name, _ in masks] == ['quality', 'no_plasmids']
+    assert [int(mask.sum()) for _, mask in masks] == [1, 3]
+
+def test_sample_mask(test_data_dir):
+    """Test sampling is reproducible and respects the sample size."""
+    rep_ids, _ = load_sequence_mapping(test_data_dir)
+    metadata = load_metadata(test_data_dir, rep_ids)
+    mask = apply_filters_mask(metadata)
+    
+    sample = sample_mask(metadata, mask, n=2, seed=42)
+    assert sample.sum() == 2
+    assert (sample & ~mask).sum() == 0
+    assert (sample == sample_mask(metadata, mask, n=2, seed=42)).all()
+    assert sample_mask(metadata, mask, n=10, seed=42).sum() == 4
+
+def test_sample_mask_stratified(test_data_dir):
+    """Test stratified sampling keeps the sample size per stratum."""
+    rep_ids, _ = load_sequence_mapping(test_data_dir)
+    metadata = load_metadata(test_data_dir, rep_ids)
+    mask = apply_filters_mask(metadata)
+    
+    sample = sample_mask(metadata, mask, n=1, stratify_by='pred_lifestyle', seed=0)
+    lifestyles = select_rows(metadata['viral_desc'], sample)['pred_lifestyle']
+    assert sorted(lifestyles) == ['temperate', 'uncertain', 'virulent']
+    
+    # Missing host domain forms its own stratum
+    sample = sample_mask(metadata, mask, fraction=1.0, stratify_by='host_domain', seed=0)
+    assert sample.sum() == 4
+    
+    # Sample sizes round half up, so single-member strata are kept
+    sample = sample_mask(metadata, mask, fraction=0.5, stratify_by='pred_lifestyle', seed=0)
+    lifestyles = select_rows(metadata['viral_desc'], sample)['pred_lifestyle']
+    assert sorted(lifestyles) == ['temperate', 'uncertain', 'virulent']
+    
+    # No candidates gives an empty sample
+    empty = apply_filters_mask(metadata, quality='Complete', min_length=10000)
+    sample = sample_mask(metadata, empty, n=1, stratify_by='Host_Phylum', seed=0)
+    assert sample.sum() == 0
+    
+    with pytest.raises(ValueError, match="Unknown column"):
+        sample_mask(metadata, mask, n=1, stratify_by='nope')
+    with pytest.raises(ValueError, match="exactly one"):
+        sample_mask(metadata, mask)
+
+def test_apply_filters_id_lists(test_data_dir):
+    """Test include and exclude ID bitmaps combine with other criteria."""
+    rep_ids, _ = load_sequence_mapping(test_data_dir)
+    metadata = load_metadata(test_data_dir, rep_ids)
+    include = rep_ids.bitmap(rep_ids.encode(['seq1', 'seq2', 'seq4']))
+    exclude = rep_ids.bitmap(rep_ids.encode(['seq2']))
+    
+    filtered_ids = apply_filters(metadata, host_domain='Bacteria',
+                                 include_ids=include, exclude_ids=exclude)
+    assert filtered_ids == {'seq1', 'seq4'}
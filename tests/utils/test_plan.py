@@ -0,0 +1,86 @@
+# tests/utils/test_plan.py
+"""Test filter query plans and estimates."""
+
+import gzip
+import pytest
+from avrc.utils.metadata import load_sequence_mapping, load_metadata, criterion_masks, apply_filters_mask
+from avrc.utils.plan import (criterion_selectivity, extraction_model, calibrate_throughput,
+                             estimate_output)
+
+@pytest.fixture
+def metadata(test_data_dir):
+    """Metadata of the test representatives."""
+    rep_ids, _ = load_sequence_mapping(test_data_dir)
+    return load_metadata(test_data_dir, rep_ids)
+
+def test_criterion_selectivity(metadata):
+    """Test per-criterion matches and cumulative remaining counts."""
+    masks = criterion_masks(metadata, min_length=2000, lifestyle='temperate')
+    total, rows = criterion_selectivity(metadata, masks)
+    
+    assert total == 4
+    assert [r['criterion'] for r in rows] == ['min_length', 'lifestyle']
+    assert [r['matches'] for r in rows] == [3, 2]
+    assert rows[0]['selectivity'] == 0.75
+    assert [r['remaining'] for r in rows] == [3, 1]
+
+def test_calibrate_throughput(tmp_path):
+    """Test calibration on single and multi-member gzip files."""
+    path = tmp_path / "seqs.fasta.gz"
+    with open(path, 'wb') as f:
+        for i in range(3):
+            f.write(gzip.compress(f">seq{i}\n{'ACGT' * 1000}\n".encode()))
+    
+    throughput = calibrate_throughput(path)
+    assert throughput['inflate'] > 0
+    assert throughput['deflate'] > 0
+    
+    (tmp_path / "plain.txt").write_text("not gzip")
+    assert calibrate_throughput(tmp_path / "plain.txt") is None
+    assert calibrate_throughput(tmp_path / "missing.gz") is None
+
+def test_extraction_model():
+    """Test workers follow the extraction path that will run."""
+    assert extraction_model(4, 0, False) == {'workers': 1, 'seqkit_threads': 4,
+                                             'serial_deflate': False}
+    assert extraction_model(4, 2, False) == {'workers': 2, 'seqkit_threads': 1,
+                                             'serial_deflate': False}
+    assert extraction_model(4, 8, True) == {'workers': 4, 'seqkit_threads': 1,
+                                            'serial_deflate': True}
+
+def test_calibrate_throughput_seqkit(tmp_path, mocker):
+    """Test the read rate is timed with seqkit when available."""
+    path = tmp_path / "seqs.fasta.gz"
+    path.write_bytes(gzip.compress(b">seq1\nACGT\n"))
+    mocker.patch('shutil.which', return_value='/usr/bin/seqkit')
+    mock_run = mocker.patch('subprocess.run')
+    mock_run.return_value.stdout = b"seq1\n"
+    
+    throughput = calibrate_throughput(path, seqkit_threads=4)
+    assert throughput['reader'] == 'seqkit'
+    assert mock_run.call_args[0][0] == ['seqkit', 'seq', '-n', '-j', '4']
+    
+    mocker.patch('shutil.which', return_value=None)
+    assert calibrate_throughput(path, seqkit_threads=4)['reader'] == 'zlib'
+
+def test_estimate_output(metadata, test_data_dir):
+    """Test size and time estimates scale with the selected bases."""
+    mask = apply_filters_mask(metadata, min_length=3000)
+    sequence_file = test_data_dir / 'AVrC_allrepresentatives.fasta.gz'
+    catalogue_bytes = sequence_file.stat().st_size
+    throughput = {'inflate': catalogue_bytes, 'deflate': 7000}
+    
+    estimate = estimate_output(metadata, mask, [sequence_file], throughput, workers=2)
+    assert estimate['sequences'] == 2
+    assert estimate['bases'] == 7000
+    assert estimate['compressed_bytes'] == int(catalogue_bytes * 0.7)
+    assert estimate['seconds'] == pytest.approx(1.0)
+    
+    # Compression in a single process is not split across workers
+    estimate = estimate_output(metadata, mask, [sequence_file], throughput, workers=2,
+                               serial_deflate=True)
+    assert estimate['seconds'] == pytest.approx(1.5)
+    
+    estimate = estimate_output(metadata, mask, [test_data_dir / 'missing.fasta.gz'])
+    assert estimate['compressed_bytes'] is None
+    assert estimate['seconds'] is None
@@ -1,8 +1,11 @@
 # tests/utils/test_seqkit.py
+import gzip
+import shutil
 import subprocess
 import pytest
 from pathlib import Path
-from avrc.utils.seqkit import verify_seqkit, count_sequences, filter_sequences
+from avrc.utils.seqkit import (verify_seqkit, count_sequences, filter_sequences,
+                               find_sequence_shards, filter_sequence_shards)
 
 def test_verify_seqkit_success(mocker):
     """Test successful seqkit verification."""
@@ -94,4 +97,64 @@ def test_filter_sequences_error(mocker):
     
     # Test error handling
     with pytest.raises(RuntimeError, match="Error filtering sequences"):
-        filter_sequences("input.fasta", "output.fasta", "ids.txt")
\ No newline at end of file
+        filter_sequences("input.fasta", "output.fasta", "ids.txt")
+
+def test_filter_sequences_threads(mocker, tmp_path):
+    """Test seqkit worker threads are passed through."""
+    mock_run = mocker.patch('subprocess.run')
+    mock_run.return_value.returncode = 0
+    
+    filter_sequences("input.fasta", "output.fasta", "ids.txt", threads=4)
+    
+    assert mock_run.call_args[0][0][-2:] == ['-j', '4']
+
+def test_find_sequence_shards(tmp_path):
+    """Test shard discovery in a shard directory."""
+    sequence_file = tmp_path / "AVrC_allrepresentatives.fasta.gz"
+    split_dir = tmp_path / "AVrC_allrepresentatives.fasta.gz.split"
+    split_dir.mkdir()
+    assert find_sequence_shards(split_dir, sequence_file) == []
+    
+    for i in [2, 1]:
+        (split_dir / f"AVrC_allrepresentatives.part_00{i}.fasta.gz").touch()
+    (split_dir / "other.part_001.fasta.gz").touch()
+    
+    shards = find_sequence_shards(split_dir, sequence_file)
+    assert [s.name for s in shards] == [
+        "AVrC_allrepresentatives.part_001.fasta.gz",
+        "AVrC_allrepresentatives.part_002.fasta.gz"
+    ]
+    # Shards next to the catalogue are only used when asked for
+    assert find_sequence_shards(tmp_path, sequence_file) == []
+
+def test_filter_sequence_shards(mocker, tmp_path):
+    """Test shards are filtered separately and merged in order."""
+    shards = []
+    for i in range(3):
+        shard = tmp_path / f"cat.part_00{i}.fasta.gz"
+        with gzip.open(shard, 'wt') as f:
+            f.write(f">seq{i}\nACGT\n")
+        shards.append(shard)
+    
+    def fake_run(cmd, check):
+        # Copy the shard to the output like a seqkit grep matching everything
+        shutil.copy(cmd[4], cmd[6])
+    mocker.patch('subprocess.run', side_effect=fake_run)
+    
+    output_file = tmp_path / "out.fasta.gz"
+    filter_sequence_shards(shards, output_file, tmp_path / "ids.txt", processes=2)
+    
+    with gzip.open(output_file, 'rt') as f:
+        assert f.read() == ">seq0\nACGT\n>seq1\nACGT\n>seq2\nACGT\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [s.name for s in shards] + ["out.fasta.gz"]
+    )
+
+def test_filter_sequence_shards_error(mocker, tmp_path):
+    """Test shard outputs are cleaned up when a worker fails."""
+    mock_run = mocker.patch('subprocess.run')
+    mock_run.side_effect = subprocess.SubprocessError("Mock error")
+    
+    with pytest.raises(RuntimeError, match="Error filtering sequences"):
+        filter_sequence_shards([tmp_path / "a.fasta.gz"], tmp_path / "out.fasta.gz", "ids.txt")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,75 @@
+# tests/utils/test_summary.py
+"""Test pre-aggregated catalogue statistics."""
+
+import os
+from avrc.utils.summary import summarize, load_cube, CUBE_NAME, CUBE_DIMENSIONS
+
+def test_load_cube(test_data_dir):
+    """Test the cube holds every grouping and is cached."""
+    cube = load_cube(test_data_dir)
+    
+    assert cube['grouping'].nunique() == 2 ** len(CUBE_DIMENSIONS)
+    assert (test_data_dir / CUBE_NAME).exists()
+    
+    cached = load_cube(test_data_dir)
+    assert len(cached) == len(cube)
+    total = cached[cached['grouping'].isna()]
+    assert total['sequences'].tolist() == [4]
+    assert total['total_length'].tolist() == [10000]
+
+def test_summarize_from_cube(test_data_dir):
+    """Test pre-aggregated groupings are answered from the cube."""
+    summary, from_cube = summarize(test_data_dir, ['host_phylum', 'lifestyle'])
+    
+    assert from_cube is True
+    assert list(summary.columns[:2]) == ['lifestyle', 'host_phylum']
+    temperate = summary[summary['lifestyle'] == 'temperate']
+    assert temperate['host_phylum'].tolist() == ['Firmicutes', 'Proteobacteria']
+    assert summary[summary['lifestyle'] == 'uncertain']['host_phylum'].tolist() == ['Unknown']
+
+def test_summarize_fallback(test_data_dir):
+    """Test other groupings are aggregated from the metadata."""
+    summary, from_cube = summarize(test_data_dir, ['host_domain'])
+    
+    assert from_cube is False
+    assert dict(zip(summary['host_domain'], summary['sequences'])) == {'Bacteria': 3, 'Unknown': 1}
+    bacteria = summary[summary['host_domain'] == 'Bacteria'].iloc[0]
+    assert bacteria['median_length'] == 2000
+    assert bacteria['max_length'] == 4000
+
+def test_cube_rebuilt_when_stale(test_data_dir):
+    """Test the cube is rebuilt when the metadata changes."""
+    load_cube(test_data_dir)
+    quality_file = test_data_dir / 'AvRCv1.Merged_Quality.csv'
+    quality_file.write_text(quality_file.read_text().replace('1000', '1500'))
+    
+    summary, _ = summarize(test_data_dir, [])
+    assert summary['total_length'].tolist() == [10500]
+
+def test_cube_rebuilt_when_metadata_replaced_with_older_mtime(test_data_dir):
+    """Test replaced metadata with an older mtime, as extracted from an archive, rebuilds the cube."""
+    load_cube(test_data_dir)
+    quality_file = test_data_dir / 'AvRCv1.Merged_Quality.csv'
+    quality_file.write_text(quality_file.read_text().replace('4000', '4200'))
+    old_mtime = (test_data_dir / CUBE_NAME).stat().st_mtime_ns - 10**12
+    os.utime(quality_file, ns=(old_mtime, old_mtime))
+    
+    summary, from_cube = summarize(test_data_dir, [])
+    assert from_cube is True
+    assert summary['total_length'].tolist() == [10200]
+
+def test_summarize_empty_catalogue(test_data_dir):
+    """Test a catalogue without representatives reports zero counts."""
+    quality_file = test_data_dir / 'AvRCv1.Merged_Quality.csv'
+    quality_file.write_text(quality_file.read_text().splitlines()[0] + "\n")
+    
+    summary, from_cube = summarize(test_data_dir, [])
+    assert from_cube is True
+    assert summary['sequences'].tolist() == [0]
+    assert summary['total_length'].tolist() == [0]
+    
+    summary, _ = summarize(test_data_dir, ['quality', 'host_phylum'])
+    assert summary.empty
+    summary, from_cube = summarize(test_data_dir, ['host_domain'])
+    assert from_cube is False
+    assert summary.empty
@@ -0,0 +1,131 @@
+# tests/utils/test_zenodo.py
+"""Test Zenodo download utilities against a local flaky HTTP server."""
+
+import hashlib
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from avrc.utils.zenodo import download_file, next_chunk_size, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE
+
+PAYLOAD = bytes(range(256)) * 2048  # 512 KiB
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Serve PAYLOAD with Range support, failing as scripted in server.faults."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get('Range'))
+        fault = self.server.faults.pop(0) if self.server.faults else None
+        if fault == 'error':
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if fault == 'stall':
+            time.sleep(1)
+
+        start = 0
+        if self.headers.get('Range'):
+            start = int(self.headers['Range'].split('=')[1].rstrip('-'))
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if fault == 'drop':
+            # Announce the full body but close the connection halfway
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+@pytest.fixture
+def flaky_server():
+    """Start a local HTTP server serving PAYLOAD."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    server.faults = []
+    server.ranges = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def file_info_for(server):
+    """Build Zenodo-style file information for the local server."""
+    return {
+        'size': len(PAYLOAD),
+        'checksum': f"md5:{hashlib.md5(PAYLOAD).hexdigest()}",
+        'download_url': f"http://127.0.0.1:{server.server_address[1]}/file"
+    }
+
+def test_download_file(flaky_server, tmp_path):
+    """Test a plain download is verified and moved into place."""
+    output_path = tmp_path / "file.gz"
+    
+    assert download_file("file.gz", file_info_for(flaky_server), output_path, backoff=0)
+    assert output_path.read_bytes() == PAYLOAD
+    assert not (tmp_path / "file.gz.tmp").exists()
+
+def test_download_file_resumes_after_drop(flaky_server, tmp_path):
+    """Test a dropped connection is retried from the partial file."""
+    flaky_server.faults = ['drop', 'drop']
+    output_path = tmp_path / "file.gz"
+    
+    assert download_file("file.gz", file_info_for(flaky_server), output_path, backoff=0)
+    assert output_path.read_bytes() == PAYLOAD
+    assert flaky_server.ranges[0] is None
+    assert flaky_server.ranges[1] == f"bytes={len(PAYLOAD) // 2}-"
+
+def test_download_file_retries_server_error_and_timeout(flaky_server, tmp_path):
+    """Test server errors and stalled reads are retried."""
+    flaky_server.faults = ['error', 'stall']
+    output_path = tmp_path / "file.gz"
+    
+    assert download_file("file.gz", file_info_for(flaky_server), output_path,
+                         timeout=(5, 0.2), backoff=0)
+    assert output_path.read_bytes() == PAYLOAD
+    assert len(flaky_server.ranges) == 3
+
+def test_download_file_keeps_partial_file(flaky_server, tmp_path):
+    """Test the partial file is kept when retries are exhausted."""
+    flaky_server.faults = ['drop', 'drop']
+    output_path = tmp_path / "file.gz"
+    
+    with pytest.raises(RuntimeError, match="run the command again to resume"):
+        download_file("file.gz", file_info_for(flaky_server), output_path,
+                      retries=1, backoff=0)
+    partial_size = (tmp_path / "file.gz.tmp").stat().st_size
+    assert 0 < partial_size < len(PAYLOAD)
+    
+    assert download_file("file.gz", file_info_for(flaky_server), output_path, backoff=0)
+    assert output_path.read_bytes() == PAYLOAD
+
+def test_download_file_checksum_mismatch(flaky_server, tmp_path):
+    """Test a corrupt download is removed."""
+    file_info = dict(file_info_for(flaky_server), checksum="md5:0")
+    
+    with pytest.raises(RuntimeError, match="Checksum verification failed"):
+        download_file("file.gz", file_info, tmp_path / "file.gz", backoff=0)
+    assert not (tmp_path / "file.gz.tmp").exists()
+
+def test_download_file_limit_rate(flaky_server, tmp_path):
+    """Test the transfer rate limit is respected."""
+    start = time.monotonic()
+    download_file("file.gz", file_info_for(flaky_server), tmp_path / "file.gz",
+                  chunk_size=64*1024, limit_rate=2*1024*1024)
+    
+    assert time.monotonic() - start >= 0.2
+
+def test_next_chunk_size():
+    """Test read sizes adapt to the transfer speed within bounds."""
+    assert next_chunk_size(1024*1024, 0.01, 1024*1024) == 2*1024*1024
+    assert next_chunk_size(1024*1024, 5, 1024*1024) == 512*1024
+    assert next_chunk_size(1024*1024, 0.01, 10) == 1024*1024
+    assert next_chunk_size(MAX_CHUNK_SIZE, 0.01, MAX_CHUNK_SIZE) == MAX_CHUNK_SIZE
+    assert next_chunk_size(MIN_CHUNK_SIZE, 5, MIN_CHUNK_SIZE) == MIN_CHUNK_SIZE